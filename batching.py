@@ -0,0 +1,37 @@
+"""
+Batched iteration over large result sets.
+
+iter_batches() streams rows with a server-side cursor where the database
+supports one, and otherwise walks the primary key in keyset batches, so
+memory stays bounded by the batch size either way.
+"""
+
+from extensions import db
+
+def iter_batches(statement, id_column, batch_size):
+    """
+    Yield lists of rows from a select without loading the whole result.
+
+    Args:
+        statement: Select that includes id_column
+        id_column: Unique, indexed column used to resume keyset batches
+        batch_size: Rows per batch
+    """
+    if db.engine.dialect.supports_server_side_cursors:
+        # Stream on a separate connection so callers may commit between batches
+        with db.engine.connect() as connection:
+            result = connection.execution_options(yield_per=batch_size).execute(statement)
+            yield from result.partitions()
+        return
+
+    # No server-side cursors (e.g. SQLite): walk the key in keyset batches
+    last_id = None
+    while True:
+        page = statement.order_by(id_column).limit(batch_size)
+        if last_id is not None:
+            page = page.where(id_column > last_id)
+        batch = db.session.execute(page).all()
+        if not batch:
+            return
+        yield batch
+        last_id = getattr(batch[-1], id_column.key)
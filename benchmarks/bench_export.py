@@ -0,0 +1,90 @@
+"""
+Benchmark streaming exports: throughput and peak memory while exporting.
+
+    python -m benchmarks.bench_export --donations 1000000 --format csv --gzip
+"""
+
+import argparse
+import os
+import random
+import resource
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import add_drop_tables_argument, make_app, report, seed_users, timer
+from exports import export_rows
+from extensions import db
+from models import Donation
+from utils import BLOOD_TYPES
+
+def seed_donations(count, donors, batch_size=20000):
+    """Bulk insert synthetic donations spread over the seeded donors"""
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    for start in range(0, count, batch_size):
+        rows = [{
+            'donor_id': rng.randint(1, donors),
+            'blood_type': rng.choice(BLOOD_TYPES),
+            'units': rng.randint(1, 2),
+            'center': f'Center {rng.randint(1, 40)}',
+            'status': rng.choice(('pending', 'completed', 'cancelled')),
+            'donation_date': now - timedelta(minutes=rng.randint(0, 2000000)),
+        } for _ in range(min(batch_size, count - start))]
+        db.session.execute(db.insert(Donation), rows)
+        db.session.commit()
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--donations', type=int, default=1000000)
+    parser.add_argument('--donors', type=int, default=10000)
+    parser.add_argument('--format', choices=('csv', 'ndjson'), default='csv')
+    parser.add_argument('--gzip', action='store_true')
+    parser.add_argument('--database-url', help='Defaults to a temporary SQLite file')
+    add_drop_tables_argument(parser)
+    args = parser.parse_args()
+
+    temp_dir = None
+    database_url = args.database_url
+    if not database_url:
+        temp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(temp_dir.name, 'export.db')}"
+
+    app = make_app(database_url, drop_tables=args.drop_tables)
+    results = {}
+    with app.app_context():
+        with timer(f'seed {args.donations} donations', results):
+            seed_users(args.donors)
+            seed_donations(args.donations, args.donors)
+        db.session.remove()
+
+        rss_before = peak_rss_mb()
+        size = 0
+        chunks = 0
+        samples = []
+        with timer('export', results):
+            for chunk in export_rows('donations', args.format, compress=args.gzip):
+                size += len(chunk)
+                chunks += 1
+                if chunks % 20 == 0:
+                    samples.append(peak_rss_mb())
+        rss_after = peak_rss_mb()
+
+    report(results)
+    elapsed = results['export']
+    print(f"exported {args.donations} rows as {args.format}{'.gz' if args.gzip else ''}: "
+          f"{size / 1048576:.1f} MB in {chunks} chunks, {args.donations / elapsed:.0f} rows/s")
+    print(f"peak RSS before export {rss_before:.1f} MB, after {rss_after:.1f} MB "
+          f"(growth {rss_after - rss_before:.1f} MB)")
+    if samples:
+        print(f"peak RSS at 5% / 50% / 100% of export: {samples[len(samples) // 20]:.1f} / "
+              f"{samples[len(samples) // 2]:.1f} / {samples[-1]:.1f} MB")
+    if temp_dir:
+        temp_dir.cleanup()
+
+if __name__ == '__main__':
+    main()
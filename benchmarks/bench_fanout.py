@@ -0,0 +1,62 @@
+"""
+Benchmark urgent-request fan-out: stream matching donors and queue alerts.
+
+    python -m benchmarks.bench_fanout --donors 100000
+"""
+
+import argparse
+import os
+import tempfile
+from datetime import datetime
+
+from benchmarks.common import add_drop_tables_argument, make_app, report, seed_users, timer
+from extensions import db
+from models import BloodRequest, OutboundEmail, User
+from notifications import fan_out_request
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--donors', type=int, default=100000)
+    parser.add_argument('--database-url', help='Defaults to a temporary SQLite file')
+    add_drop_tables_argument(parser)
+    parser.add_argument('--blood-type', default='AB+', help='AB+ matches every donor type')
+    args = parser.parse_args()
+
+    # Fan-out streams on its own connection, so in-memory SQLite will not do
+    temp_dir = None
+    database_url = args.database_url
+    if not database_url:
+        temp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(temp_dir.name, 'fanout.db')}"
+
+    app = make_app(database_url, drop_tables=args.drop_tables)
+    results = {}
+    with app.app_context():
+        with timer(f'seed {args.donors} donors', results):
+            seed_users(args.donors)
+
+        requester = User(email='hospital@bench.example.com', first_name='Bench', last_name='Hospital', role='receiver')
+        db.session.add(requester)
+        db.session.flush()
+        blood_request = BloodRequest(
+            requester_id=requester.id, blood_type=args.blood_type, units_needed=3,
+            urgency='emergency', hospital='Bench General', required_by=datetime.utcnow()
+        )
+        db.session.add(blood_request)
+        db.session.commit()
+
+        with timer('fan-out', results):
+            notified = fan_out_request(blood_request, 'https://bloodbridge.example.com/blood-requests')
+        with timer('fan-out again (all deduplicated)', results):
+            repeated = fan_out_request(blood_request, 'https://bloodbridge.example.com/blood-requests')
+
+        queued = db.session.query(db.func.count(OutboundEmail.id)).scalar()
+
+    report(results)
+    print(f"notified {notified} donors ({notified / results['fan-out']:.0f}/s), "
+          f"{repeated} on repeat, {queued} emails queued")
+    if temp_dir:
+        temp_dir.cleanup()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark the bulk CSV importer: donors first, then historical donations.
+
+    python -m benchmarks.bench_import --donors 100000 --donations 200000
+
+Before timing, checks the importer's edge cases (an empty file, a row with
+more fields than the header) and afterwards that imported completed
+donations reached blood stock; fails (exit status 1) if any check does not
+hold.
+"""
+
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from benchmarks.common import add_drop_tables_argument, make_app, report, timer
+from import_data import run_import
+from utils import BLOOD_TYPES
+
+def write_donors(path, count, rng):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['email', 'first_name', 'last_name', 'blood_type', 'phone', 'last_donation_date'])
+        for i in range(count):
+            # ~1% malformed rows so the reject path is exercised too
+            email = f'import{i}@bench.example.com' if rng.random() > 0.01 else f'broken{i}'
+            last_donation = (datetime(2024, 1, 1) + timedelta(days=rng.randint(0, 300))).strftime('%Y-%m-%d')
+            writer.writerow([email, f'Donor{i}', 'Import', rng.choice(BLOOD_TYPES), '555-0100', last_donation])
+
+def write_donations(path, count, donors, rng):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['email', 'donation_date', 'units', 'center'])
+        for _ in range(count):
+            donation_date = datetime(2023, 1, 1) + timedelta(minutes=rng.randint(0, 900000))
+            writer.writerow([f'import{rng.randrange(donors)}@bench.example.com',
+                             donation_date.strftime('%Y-%m-%d %H:%M:%S'), rng.randint(1, 2), 'City Center'])
+
+def check_edge_cases(directory):
+    """Run the importer on malformed files; returns a list of failures"""
+    failures = []
+    empty = os.path.join(directory, 'empty.csv')
+    open(empty, 'w').close()
+    for kind in ('donors', 'donations'):
+        result = run_import(kind, empty)
+        if result != (0, 0):
+            failures.append(f"empty {kind} file: {result} instead of (0, 0)")
+
+    long_rows = os.path.join(directory, 'long_rows.csv')
+    rejects = os.path.join(directory, 'long_rows_rejects.csv')
+    with open(long_rows, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['email', 'first_name', 'last_name'])
+        writer.writerow(['edge1@bench.example.com', 'Edge', 'Case', 'extra'])
+        writer.writerow(['edge2@bench.example.com', 'Edge', 'Case'])
+    result = run_import('donors', long_rows, rejects_path=rejects)
+    if result != (1, 1):
+        failures.append(f"row with extra fields: {result} instead of (1, 1)")
+    with open(rejects, newline='') as f:
+        errors = [row['error'] for row in csv.DictReader(f)]
+    if errors != ['more fields than the header']:
+        failures.append(f"row with extra fields: rejects file has {errors}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--donors', type=int, default=100000)
+    parser.add_argument('--donations', type=int, default=200000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--database-url', help='Defaults to a temporary SQLite file')
+    add_drop_tables_argument(parser)
+    args = parser.parse_args()
+
+    temp_dir = tempfile.TemporaryDirectory()
+    database_url = args.database_url or f"sqlite:///{os.path.join(temp_dir.name, 'import.db')}"
+    donors_csv = os.path.join(temp_dir.name, 'donors.csv')
+    donations_csv = os.path.join(temp_dir.name, 'donations.csv')
+    rng = random.Random(11)
+    write_donors(donors_csv, args.donors, rng)
+    write_donations(donations_csv, args.donations, args.donors, rng)
+
+    app = make_app(database_url, drop_tables=args.drop_tables)
+    results = {}
+    counts = {}
+    with app.app_context():
+        failures = check_edge_cases(temp_dir.name)
+        with timer('import donors', results):
+            counts['donors'] = run_import('donors', donors_csv, args.batch_size,
+                                          os.path.join(temp_dir.name, 'rejects.csv'))
+        with timer('import donations', results):
+            counts['donations'] = run_import('donations', donations_csv, args.batch_size,
+                                             os.path.join(temp_dir.name, 'rejects.csv'))
+
+        from extensions import db
+        from models import BloodStock, Donation
+        donated = db.session.scalar(db.select(db.func.sum(Donation.units)).where(Donation.status == 'completed'))
+        stocked = db.session.scalar(db.select(db.func.sum(BloodStock.units)))
+        if donated != stocked:
+            failures.append(f"completed donations hold {donated} units but stock has {stocked}")
+
+    report(results)
+    for kind, total in (('donors', args.donors), ('donations', args.donations)):
+        inserted, rejected = counts[kind]
+        print(f"{kind:<10} {inserted} inserted, {rejected} rejected, "
+              f"{total / results[f'import {kind}']:.0f} rows/s")
+    temp_dir.cleanup()
+
+    if failures:
+        print('\nFAIL:\n  ' + '\n  '.join(failures))
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Benchmark the donor matching query against synthetic donors.
+
+    python -m benchmarks.bench_matching --donors 1000000
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+from benchmarks.common import DEFAULT_DATABASE_URL, add_drop_tables_argument, make_app, report, seed_users, timer
+from extensions import db
+from matching import find_matching_donors
+from models import BloodRequest
+from utils import BLOOD_TYPES
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--donors', type=int, default=100000)
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL)
+    add_drop_tables_argument(parser)
+    parser.add_argument('--pages', type=int, default=5)
+    args = parser.parse_args()
+
+    app = make_app(args.database_url, drop_tables=args.drop_tables)
+    results = {}
+    with app.app_context():
+        with timer(f'seed {args.donors} donors', results):
+            seed_users(args.donors)
+
+        now = datetime.utcnow()
+        for blood_type in BLOOD_TYPES:
+            for urgency, required_by in (('normal', now + timedelta(days=14)), ('emergency', now)):
+                blood_request = BloodRequest(blood_type=blood_type, urgency=urgency, required_by=required_by)
+                label = f'match {blood_type} {urgency} (per page)'
+                with timer(label, results):
+                    for page in range(1, args.pages + 1):
+                        find_matching_donors(blood_request, page=page)
+                results[label] /= args.pages
+                db.session.expunge_all()
+
+    report(results)
+
+if __name__ == '__main__':
+    main()
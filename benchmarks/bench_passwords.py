@@ -0,0 +1,47 @@
+"""
+Benchmark password verification throughput through PasswordHasher.
+
+Simulates concurrent logins from request threads, first verifying on the
+calling thread and then on the process pool.
+
+    python -m benchmarks.bench_passwords --logins 200 --threads 16 --method scrypt:32768:8:1
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passwords import DEFAULT_METHOD, PasswordHasher
+
+def run(hasher, pwhash, logins, threads):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda _: hasher.verify(pwhash, 'correct horse'), range(logins)))
+    elapsed = time.perf_counter() - started
+    assert all(results)
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent request threads')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Pool processes')
+    parser.add_argument('--method', default=DEFAULT_METHOD)
+    args = parser.parse_args()
+
+    print(f"method               {args.method}")
+    print(f"logins               {args.logins} from {args.threads} threads")
+    for label, workers in (('request thread', 0), ('process pool', args.workers)):
+        # Admit every thread so the run measures throughput, not shedding
+        hasher = PasswordHasher(method=args.method, workers=workers, max_pending=args.threads, timeout=600)
+        pwhash = hasher.hash('correct horse')
+        run(hasher, pwhash, min(args.logins, max(workers, 1)), args.threads)  # warm up the pool
+        elapsed = run(hasher, pwhash, args.logins, args.threads)
+        cores = max(workers, 1)
+        rate = args.logins / elapsed
+        print(f"{label:<20} {rate:.1f} logins/s on {cores} core(s), {rate / cores:.1f} logins/s per core")
+        hasher.shutdown()
+
+if __name__ == '__main__':
+    main()
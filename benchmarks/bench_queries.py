@@ -0,0 +1,139 @@
+"""
+Guard the list pages against N+1 queries.
+
+Seeds a temporary database with a few rows, renders each list page under
+count_queries() with QUERY_BUDGET set, then grows the data past a full page
+and renders them again. Fails (exit status 1) when a page exceeds the budget
+or its query count grows with the number of rows it shows.
+
+    python -m benchmarks.bench_queries --budget 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from extensions import db
+from query_counter import QueryBudgetExceeded, count_queries
+
+# (login as, path) for every page guarded here
+PAGES = (
+    ('admin', '/admin'),
+    ('admin', '/admin/verifications'),
+    ('admin', '/admin/users'),
+    ('admin', '/blood-requests'),
+    ('receiver', '/blood-requests'),
+    ('donor', '/blood-requests'),
+)
+
+def seed(rows, start, admin_id, receiver_id):
+    """
+    Add rows donations, verifications, requests and admin log entries.
+
+    Donations and verifications belong to different donors, so a page that
+    lazy-loads one list's donors cannot be served from another's joins.
+    """
+    from models import AdminActionLog, BloodRequest, Donation, DonorVerification, User
+
+    now = datetime.utcnow()
+    for i in range(start, start + rows):
+        created = now - timedelta(minutes=i)
+        donor, applicant = (
+            User(email=f'{kind}{i}@queries.example.com', first_name=f'{kind.title()}{i}', last_name='Queries',
+                 password_hash='x', role='donor', blood_type='O-', created_at=created)
+            for kind in ('donor', 'applicant')
+        )
+        db.session.add_all([donor, applicant])
+        db.session.flush()
+        db.session.add_all([
+            Donation(donor_id=donor.id, blood_type='O-', units=1, center='Bench', status='pending',
+                     donation_date=created),
+            DonorVerification(donor_id=applicant.id, submission_date=created, status='pending'),
+            BloodRequest(requester_id=receiver_id, blood_type='O-', units_needed=1, urgency='normal',
+                         hospital='Bench', created_at=created),
+            AdminActionLog(admin_id=admin_id, action_type='bench', target_user_id=receiver_id, timestamp=created),
+        ])
+    db.session.commit()
+
+def measure(app, users, budget):
+    """Render every page and return {(role, path): query count or error}"""
+    counts = {}
+    for role, path in PAGES:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(users[role])
+            session['_fresh'] = True
+        # Warm per-process caches (identity, counters) so only the page's own queries count
+        client.get(path)
+        try:
+            with count_queries(budget) as counter:
+                response = client.get(path)
+        except QueryBudgetExceeded as e:
+            counts[(role, path)] = e
+            continue
+        if response.status_code != 200:
+            counts[(role, path)] = RuntimeError(f"status {response.status_code}")
+            continue
+        counts[(role, path)] = counter.count
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--few', type=int, default=2, help='Rows per table in the first round; less than any page')
+    parser.add_argument('--rows', type=int, default=40, help='Rows per table in the second round; more than a page')
+    parser.add_argument('--budget', type=int, default=8, help='Maximum queries per page')
+    args = parser.parse_args()
+
+    from factory import create_app
+    from models import User
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(temp_dir, 'queries.db')}",
+            'TESTING': True,
+            # Also enforced per request by query_counter.init_query_budget
+            'QUERY_BUDGET': args.budget,
+        })
+        with app.app_context():
+            import migrations
+
+            migrations.upgrade(db.engine)
+            users = {}
+            for role, blood_type in (('admin', None), ('receiver', 'O-'), ('donor', 'O-')):
+                user = User(email=f'{role}@queries.example.com', first_name=role, last_name='Queries',
+                            password_hash='x', role=role, blood_type=blood_type)
+                db.session.add(user)
+                db.session.commit()
+                users[role] = user.id
+            seed(args.few, 0, users['admin'], users['receiver'])
+
+        # Requests run outside the seeding context, so each gets a fresh session
+        first = measure(app, users, args.budget)
+        with app.app_context():
+            seed(args.rows - args.few, args.few, users['admin'], users['receiver'])
+        second = measure(app, users, args.budget)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    failures = []
+    print(f"{'page':<32} {args.few:>6} rows {args.rows:>6} rows")
+    for role, path in PAGES:
+        small, large = first[(role, path)], second[(role, path)]
+        label = f"{path} ({role})"
+        print(f"{label:<32} {small if isinstance(small, int) else 'FAIL':>11} {large if isinstance(large, int) else 'FAIL':>11}")
+        for result in (small, large):
+            if isinstance(result, Exception):
+                failures.append(f"{label}: {str(result).splitlines()[0]}")
+        if isinstance(small, int) and isinstance(large, int) and large > small:
+            failures.append(f"{label}: {small} -> {large} queries as rows grew (N+1?)")
+
+    if failures:
+        print('\nFAIL:\n  ' + '\n  '.join(dict.fromkeys(failures)))
+        sys.exit(1)
+    print(f"\nOK: every page within {args.budget} queries, independent of row count")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark worker boot: import time of the app module, from `python -X importtime`.
+
+Fails (exit status 1) when the import takes longer than the budget, pulls in
+a module that should only load on first use, or touches the database.
+
+    python -m benchmarks.bench_startup --budget-ms 1500 --runs 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Modules that only some requests need; importing any of them at boot is a regression
+DEFERRED_MODULES = (
+    'qrcode', 'PIL', 'fitz', 'pyotp', 'email_utils', 'smtplib', 'concurrent.futures.process',
+    # Blueprint views load on their first request
+    'blueprints.admin_views', 'blueprints.auth_views', 'blueprints.donor_views',
+    'blueprints.public_views', 'blueprints.receiver_views',
+)
+
+def parse_importtime(stderr):
+    """
+    Parse -X importtime output.
+
+    Returns:
+        dict: module name -> (self microseconds, cumulative microseconds)
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+def measure(module, database_url):
+    env = dict(os.environ, DATABASE_URL=database_url)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=1500.0,
+                        help='Maximum median import time of the module')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, 'startup.db')
+        runs = [measure(args.module, f'sqlite:///{database_path}') for _ in range(args.runs)]
+        if os.path.exists(database_path):
+            failures.append('importing the app opened the database (schema work at import?)')
+
+    totals = [modules[args.module][1] / 1000 for modules in runs]
+    median = statistics.median(totals)
+    print(f"import {args.module}: median {median:.1f} ms, min {min(totals):.1f} ms over {args.runs} runs")
+
+    last = runs[-1]
+    print(f"\ntop {args.top} modules by self time (last run):")
+    for name, (self_us, cumulative_us) in sorted(last.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {name:<45} {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms total")
+
+    loaded = [name for name in DEFERRED_MODULES if name in last]
+    if loaded:
+        failures.append(f"loaded at import: {', '.join(loaded)}")
+    if median > args.budget_ms:
+        failures.append(f"median import time {median:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+
+    if failures:
+        print('\nFAIL: ' + '; '.join(failures))
+        sys.exit(1)
+    print(f"\nOK: within {args.budget_ms:.0f} ms budget, no deferred modules loaded")
+
+if __name__ == '__main__':
+    main()
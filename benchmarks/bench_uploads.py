@@ -0,0 +1,51 @@
+"""
+Benchmark concurrent document uploads through LocalStorage.
+
+    python -m benchmarks.bench_uploads --files 300 --size-mb 4 --workers 8
+"""
+
+import argparse
+import io
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from storage import DEFAULT_CHUNK_SIZE, LocalStorage
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=120)
+    parser.add_argument('--size-mb', type=float, default=4)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--chunk-kb', type=int, default=DEFAULT_CHUNK_SIZE // 1024)
+    parser.add_argument('--duplicate-ratio', type=float, default=0.25,
+                        help='Fraction of uploads repeating an earlier payload')
+    args = parser.parse_args()
+
+    size = int(args.size_mb * 1024 * 1024)
+    unique = max(1, int(args.files * (1 - args.duplicate_ratio)))
+    payloads = [os.urandom(size) for _ in range(unique)]
+
+    root = tempfile.mkdtemp(prefix='bloodbridge-bench-')
+    storage = LocalStorage(root, chunk_size=args.chunk_kb * 1024)
+    try:
+        def upload(i):
+            return storage.save(io.BytesIO(payloads[i % unique]), 'id_documents', f'document{i}.pdf')
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            stored = set(executor.map(upload, range(args.files)))
+        elapsed = time.perf_counter() - started
+
+        total_mb = args.files * size / (1024 * 1024)
+        print(f"uploads              {args.files} x {args.size_mb} MB with {args.workers} workers")
+        print(f"elapsed              {elapsed:.2f} s")
+        print(f"throughput           {total_mb / elapsed:.1f} MB/s, {args.files / elapsed:.1f} files/s")
+        print(f"stored after dedup   {len(stored)} files")
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == '__main__':
+    main()
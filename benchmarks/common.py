@@ -0,0 +1,110 @@
+"""
+Shared setup for the benchmark scripts.
+
+Benchmarks run against a throwaway database (SQLite by default) rather than
+the application's configured one. Run them from the project root, e.g.:
+
+    python -m benchmarks.bench_matching --donors 1000000
+
+make_app() drops every table of the database it is given, so it refuses any
+URL other than in-memory SQLite or a SQLite file in the temp directory unless
+--i-know-this-drops-tables is passed.
+"""
+
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy.engine import make_url
+
+from extensions import db
+from utils import BLOOD_TYPES
+
+DEFAULT_DATABASE_URL = 'sqlite:///:memory:'
+
+def add_drop_tables_argument(parser):
+    parser.add_argument('--i-know-this-drops-tables', dest='drop_tables', action='store_true',
+                        help='Allow --database-url to point at a database other than a temporary SQLite one')
+
+def is_throwaway_database(database_url):
+    """Whether a URL is in-memory SQLite or a SQLite file under the temp directory"""
+    url = make_url(database_url)
+    if url.get_backend_name() != 'sqlite':
+        return False
+    if url.database in (None, '', ':memory:'):
+        return True
+    temp_dir = os.path.realpath(tempfile.gettempdir())
+    return os.path.commonpath([os.path.realpath(url.database), temp_dir]) == temp_dir
+
+def make_app(database_url=DEFAULT_DATABASE_URL, drop_tables=False):
+    """
+    Create a bare Flask app bound to a fresh benchmark database.
+
+    Args:
+        database_url: Database to (re)create the schema in
+        drop_tables: Allow a database that is not a temporary SQLite one;
+            all of its tables are dropped
+    """
+    if not drop_tables and not is_throwaway_database(database_url):
+        raise SystemExit(
+            f"Refusing to drop all tables in {make_url(database_url).render_as_string(hide_password=True)}; "
+            "use a temporary SQLite database or pass --i-know-this-drops-tables"
+        )
+
+    import migrations
+    import models  # noqa: F401 - registers the tables
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    db.init_app(app)
+    with app.app_context():
+        db.drop_all()
+        migrations.VERSION_TABLE.drop(db.engine, checkfirst=True)
+        # Same schema and indexes as production, including migration-only ones
+        migrations.upgrade(db.engine)
+    return app
+
+def synthetic_users(count, start=0, seed=42):
+    """Yield insertable rows for synthetic donors"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    for i in range(start, start + count):
+        last_donation = now - timedelta(days=rng.randint(0, 400)) if rng.random() < 0.7 else None
+        yield {
+            'email': f'donor{i}@bench.example.com',
+            'first_name': f'Donor{i}',
+            'last_name': 'Bench',
+            'password_hash': 'x',
+            'role': 'donor',
+            'blood_type': rng.choice(BLOOD_TYPES),
+            'is_available': rng.random() < 0.8,
+            'is_verified': rng.random() < 0.6,
+            'verification_status': 'approved',
+            'last_donation_date': last_donation,
+            'next_eligible_date': last_donation + timedelta(days=56) if last_donation else None,
+            'created_at': now,
+        }
+
+def seed_users(count, batch_size=10000):
+    """Bulk insert synthetic donors in batches"""
+    from models import User
+
+    for start in range(0, count, batch_size):
+        rows = list(synthetic_users(min(batch_size, count - start), start=start, seed=start))
+        db.session.execute(db.insert(User), rows)
+        db.session.commit()
+
+@contextmanager
+def timer(label, results):
+    """Record the wall time of a block under a label"""
+    started = time.perf_counter()
+    yield
+    results[label] = time.perf_counter() - started
+
+def report(results):
+    for label, seconds in results.items():
+        print(f"{label:<40} {seconds * 1000:10.2f} ms")
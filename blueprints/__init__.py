@@ -0,0 +1,72 @@
+"""
+Blueprints for the web routes, with lazily loaded views.
+
+Each blueprint module (admin, auth, donor, receiver, public) only declares
+its URL rules; the view functions live in the matching *_views module and
+are imported the first time one of their routes is requested. A worker that
+only ever serves public pages never loads the admin views or the upload,
+export and preview machinery behind them.
+
+app.config['BLUEPRINTS'] (or the APP_BLUEPRINTS environment variable, e.g.
+"public,auth") limits which blueprints a worker serves. The others are still
+registered so templates can build links to them, but their routes answer
+404 here and should be routed to workers that serve them.
+"""
+
+import os
+from functools import cached_property
+from importlib import import_module
+
+from flask import abort
+from werkzeug.utils import import_string
+
+BLUEPRINT_NAMES = ('public', 'auth', 'donor', 'receiver', 'admin')
+
+class LazyView:
+    """A view function imported on first call"""
+
+    def __init__(self, import_name):
+        self.__module__, self.__name__ = import_name.rsplit('.', 1)
+        self.import_name = import_name
+
+    @cached_property
+    def view(self):
+        return import_string(self.import_name)
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
+
+def _not_served(*args, **kwargs):
+    abort(404)
+
+def lazy_routes(bp, views_module):
+    """
+    Return a route(rule, endpoint, **options) helper for a blueprint.
+
+    The endpoint is also the view function's name in views_module.
+    """
+    def route(rule, endpoint, **options):
+        bp.add_url_rule(rule, endpoint, LazyView(f'{views_module}.{endpoint}'), **options)
+    return route
+
+def enabled_blueprints(app):
+    names = app.config.get('BLUEPRINTS') or os.environ.get('APP_BLUEPRINTS')
+    if not names:
+        return set(BLUEPRINT_NAMES)
+    if isinstance(names, str):
+        names = [name.strip() for name in names.split(',') if name.strip()]
+    unknown = set(names) - set(BLUEPRINT_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown blueprints in BLUEPRINTS: {', '.join(sorted(unknown))}")
+    return set(names)
+
+def register_blueprints(app):
+    """Register every blueprint, serving only the enabled ones"""
+    enabled = enabled_blueprints(app)
+    for name in BLUEPRINT_NAMES:
+        bp = import_module(f'{__name__}.{name}').bp
+        app.register_blueprint(bp)
+        if name not in enabled:
+            for endpoint in list(app.view_functions):
+                if endpoint.startswith(f'{name}.'):
+                    app.view_functions[endpoint] = _not_served
@@ -0,0 +1,19 @@
+"""Admin dashboard, user management, verification review, exports and perf"""
+
+from flask import Blueprint
+
+from blueprints import lazy_routes
+
+bp = Blueprint('admin', __name__)
+route = lazy_routes(bp, 'blueprints.admin_views')
+
+route('/admin', 'admin_dashboard')
+route('/admin/users', 'admin_users')
+route('/admin/reset-user-password/<int:user_id>', 'admin_reset_password', methods=['GET', 'POST'])
+route('/admin/verifications', 'admin_verifications')
+route('/admin/review-verification/<int:verification_id>', 'review_verification', methods=['GET', 'POST'])
+route('/admin/blood-requests/<int:request_id>/donors', 'matching_donors')
+route('/admin/donations/<int:donation_id>/status', 'update_donation_status', methods=['POST'])
+route('/admin/blood-requests/<int:request_id>/fulfil', 'fulfil_blood_request', methods=['POST'])
+route('/admin/export/<any(donations, "blood-requests", users):dataset>.<any(csv, ndjson):fmt>', 'admin_export')
+route('/admin/perf', 'admin_perf')
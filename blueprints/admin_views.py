@@ -0,0 +1,304 @@
+"""Views for the admin pages"""
+
+import json
+import logging
+from datetime import datetime
+from flask import Response, render_template, request, redirect, url_for, flash, jsonify, stream_with_context
+from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload
+
+from extensions import db
+from models import AdminActionLog, BloodRequest, Donation, DonorVerification, User
+from utils import admin_required, log_admin_action, validate_password_complexity
+from matching import find_matching_donors
+from dashboard_stats import invalidate_admin_stats
+from pagination import cursor_paginate, invalidate_counts
+from perf import perf_registry
+from user_search import user_search_filter
+from passwords import PasswordHasherBusy, password_hasher
+from exports import MIMETYPES as EXPORT_MIMETYPES, export_rows
+from metrics import VERIFICATIONS
+from inventory import InsufficientStock, stock_by_blood_type
+
+@login_required
+@admin_required
+def admin_dashboard():
+    # Get recent data for dashboard
+    blood_requests = BloodRequest.query.order_by(BloodRequest.created_at.desc()).limit(5).all()
+    donations = Donation.query.options(joinedload(Donation.donor)).order_by(
+        Donation.donation_date.desc()
+    ).limit(5).all()
+    
+    # Get recent verifications
+    recent_verifications = DonorVerification.query.options(joinedload(DonorVerification.donor)).order_by(
+        DonorVerification.submission_date.desc()
+    ).limit(5).all()
+    
+    # Get admin action logs
+    recent_admin_logs = AdminActionLog.query.options(
+        joinedload(AdminActionLog.admin), joinedload(AdminActionLog.target_user)
+    ).order_by(
+        AdminActionLog.timestamp.desc()
+    ).limit(10).all()
+    
+    return render_template(
+        'admin_dashboard.html',
+        blood_requests=blood_requests,
+        donations=donations,
+        recent_verifications=recent_verifications,
+        recent_admin_logs=recent_admin_logs,
+        stock_centers=stock_by_blood_type()
+    )
+
+@login_required
+@admin_required
+def admin_users():
+    """Admin page to view and manage users"""
+    role_filter = request.args.get('role', 'all')
+    search_query = request.args.get('search', '')
+    per_page = 10
+    
+    query = User.query
+    
+    if role_filter != 'all':
+        query = query.filter_by(role=role_filter)
+    
+    # Prefix and fuzzy name/email search backed by an index
+    search_filter = user_search_filter(search_query)
+    if search_filter is not None:
+        query = query.filter(search_filter)
+    
+    # Unfiltered, the planner's row estimate is close enough for the total
+    unfiltered = role_filter == 'all' and search_filter is None
+    page = cursor_paginate(
+        query, User.created_at, User.id, per_page,
+        cursor=request.args.get('cursor'),
+        count_key=('users', role_filter, search_query.strip()),
+        approximate_model=User if unfiltered else None
+    )
+    
+    return render_template('admin_users.html', 
+                          page=page, 
+                          role_filter=role_filter,
+                          search_query=search_query)
+
+@login_required
+@admin_required
+def admin_reset_password(user_id):
+    """Allow admins to reset user passwords"""
+    user = User.query.get_or_404(user_id)
+    
+    if request.method == 'POST':
+        password = request.form.get('password')
+        confirm_reset = request.form.get('confirm_reset')
+        
+        # Validate confirmation
+        if not confirm_reset:
+            flash('You must confirm the password reset.', 'danger')
+            return render_template('admin_reset_password.html', user=user)
+        
+        # Validate password complexity
+        is_valid, error_message = validate_password_complexity(password)
+        if not is_valid:
+            flash(error_message, 'danger')
+            return render_template('admin_reset_password.html', user=user)
+        
+        try:
+            # Update the user's password
+            old_hash = user.password_hash  # Keep for logging
+            user.password_hash = password_hasher.hash(password)
+            db.session.commit()
+            
+            # Log the password reset action
+            log_admin_action(
+                admin_user=current_user, 
+                action_type='password_reset', 
+                target_user=user,
+                details={
+                    'method': 'admin_reset',
+                    'old_hash_changed': old_hash != user.password_hash
+                }
+            )
+            
+            flash(f'Password for {user.email} has been reset successfully.', 'success')
+            return redirect(url_for('admin.admin_users'))
+        
+        except PasswordHasherBusy:
+            # Answered with a 503 by the app's handler, like login and registration
+            db.session.rollback()
+            raise
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Error resetting password for user {user.email}: {str(e)}")
+            flash('An error occurred while resetting the password.', 'danger')
+    
+    return render_template('admin_reset_password.html', user=user)
+
+@login_required
+@admin_required
+def admin_verifications():
+    """Admin page to view all pending verifications"""
+    status_filter = request.args.get('status', 'pending')
+    per_page = 10
+    
+    # The list shows each donor's name, email and blood type
+    verifications = DonorVerification.query.options(joinedload(DonorVerification.donor))
+    if status_filter != 'all':
+        verifications = verifications.filter_by(status=status_filter)
+    
+    page = cursor_paginate(
+        verifications, DonorVerification.submission_date, DonorVerification.id, per_page,
+        cursor=request.args.get('cursor'), count_key=('verifications', status_filter)
+    )
+    
+    return render_template('admin_verifications.html', page=page, status_filter=status_filter)
+
+@login_required
+@admin_required
+def review_verification(verification_id):
+    """Admin page to review a specific verification"""
+    verification = DonorVerification.query.get_or_404(verification_id)
+    donor = User.query.get(verification.donor_id)
+    
+    if request.method == 'POST':
+        try:
+            action = request.form.get('action')
+            notes = request.form.get('notes')
+            
+            if action not in ['approve', 'reject']:
+                flash('Invalid action.', 'danger')
+                return redirect(url_for('admin.review_verification', verification_id=verification_id))
+            
+            verification.status = 'approved' if action == 'approve' else 'rejected'
+            verification.reviewer_id = current_user.id
+            verification.review_date = datetime.utcnow()
+            verification.review_notes = notes
+            
+            # Update user verification status
+            donor.verification_status = verification.status
+            if action == 'approve':
+                donor.is_verified = True
+                donor.verification_date = datetime.utcnow()
+            else:
+                donor.is_verified = False
+            
+            db.session.commit()
+            invalidate_admin_stats()
+            invalidate_counts()
+            VERIFICATIONS.inc(status=verification.status)
+            
+            flash(f'Verification has been {verification.status}.', 'success')
+            return redirect(url_for('admin.admin_verifications'))
+            
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Verification review error: {str(e)}")
+            flash('An error occurred while reviewing the verification. Please try again.', 'danger')
+    
+    # Parse questionnaire responses
+    questionnaire = json.loads(verification.questionnaire_responses) if verification.questionnaire_responses else {}
+    
+    return render_template('review_verification.html', verification=verification, donor=donor, questionnaire=questionnaire)
+
+@login_required
+@admin_required
+def matching_donors(request_id):
+    """Ranked, paginated list of donors who can fulfil a blood request"""
+    blood_request = BloodRequest.query.get_or_404(request_id)
+    page = request.args.get('page', 1, type=int)
+    donors, has_more = find_matching_donors(blood_request, page=page)
+
+    return jsonify({
+        'request_id': blood_request.id,
+        'page': page,
+        'has_more': has_more,
+        'donors': [{
+            'id': donor.id,
+            'name': donor.get_full_name(),
+            'email': donor.email,
+            'phone': donor.phone,
+            'blood_type': donor.blood_type,
+            'last_donation_date': donor.last_donation_date.isoformat() if donor.last_donation_date else None
+        } for donor in donors]
+    })
+
+@login_required
+@admin_required
+def update_donation_status(donation_id):
+    """Mark a donation as completed or cancelled; stock follows the status"""
+    donation = Donation.query.get_or_404(donation_id)
+    status = request.form.get('status')
+
+    if status not in ['completed', 'cancelled']:
+        flash('Invalid donation status.', 'danger')
+        return redirect(url_for('admin.admin_dashboard'))
+
+    try:
+        donation.status = status
+        db.session.commit()
+        invalidate_admin_stats()
+        flash(f'Donation #{donation.id} marked as {status}.', 'success')
+    except InsufficientStock as e:
+        # Cancelling a completed donation whose units were already issued
+        db.session.rollback()
+        flash(f'Donation #{donation.id} cannot be cancelled: {e}.', 'danger')
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Donation status update error: {str(e)}")
+        flash('An error occurred while updating the donation.', 'danger')
+    return redirect(url_for('admin.admin_dashboard'))
+
+@login_required
+@admin_required
+def fulfil_blood_request(request_id):
+    """Mark a blood request as fulfilled from a blood bank's stock"""
+    blood_request = BloodRequest.query.get_or_404(request_id)
+
+    if blood_request.status == 'fulfilled':
+        flash('This request has already been fulfilled.', 'info')
+        return redirect(url_for('admin.admin_dashboard'))
+
+    center = (request.form.get('center') or '').strip()
+    if not center:
+        flash('Choose the blood bank the units are issued from.', 'danger')
+        return redirect(url_for('admin.admin_dashboard'))
+
+    try:
+        blood_request.fulfilled_center = center
+        blood_request.status = 'fulfilled'
+        # The stock hook checks and takes the units under a row lock on flush
+        db.session.commit()
+        invalidate_admin_stats()
+        flash(f'Blood request #{blood_request.id} has been fulfilled from {center}.', 'success')
+    except InsufficientStock as e:
+        db.session.rollback()
+        flash(f'Blood request #{blood_request.id} was not fulfilled: {e}.', 'danger')
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Blood request fulfilment error: {str(e)}")
+        flash('An error occurred while fulfilling the request.', 'danger')
+    return redirect(url_for('admin.admin_dashboard'))
+
+@login_required
+@admin_required
+def admin_export(dataset, fmt):
+    """Stream a full table export without loading it into memory"""
+    compress = request.accept_encodings['gzip'] > 0
+    chunks = export_rows(dataset, fmt, compress=compress)
+    headers = {
+        'Content-Disposition': f'attachment; filename={dataset}-{datetime.utcnow():%Y%m%d}.{fmt}',
+        'Vary': 'Accept-Encoding',
+    }
+    if compress:
+        headers['Content-Encoding'] = 'gzip'
+    return Response(stream_with_context(chunks), mimetype=EXPORT_MIMETYPES[fmt], headers=headers)
+
+@login_required
+@admin_required
+def admin_perf():
+    """Per-endpoint latency and query statistics for this process"""
+    return render_template(
+        'admin_perf.html',
+        endpoints=perf_registry.summary(),
+        slow_queries=perf_registry.slow_queries()
+    )
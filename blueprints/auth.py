@@ -0,0 +1,19 @@
+"""Login, registration, 2FA, password reset and the user's profile"""
+
+from flask import Blueprint
+
+from blueprints import lazy_routes
+
+bp = Blueprint('auth', __name__)
+route = lazy_routes(bp, 'blueprints.auth_views')
+
+route('/login', 'login', methods=['GET', 'POST'])
+route('/verify-2fa', 'verify_2fa', methods=['GET', 'POST'])
+route('/setup-2fa', 'setup_2fa', methods=['GET', 'POST'])
+route('/setup-2fa/qr.<any(png, svg):fmt>', 'setup_2fa_qr')
+route('/disable-2fa', 'disable_2fa', methods=['POST'])
+route('/register', 'register', methods=['GET', 'POST'])
+route('/forgot-password', 'forgot_password', methods=['GET', 'POST'])
+route('/reset-password', 'reset_password', methods=['GET', 'POST'])
+route('/profile', 'profile')
+route('/logout', 'logout')
@@ -0,0 +1,247 @@
+"""Views for login, registration, 2FA, password reset and the profile page"""
+
+import logging
+from datetime import datetime
+from flask import abort, make_response, render_template, request, redirect, url_for, flash, session
+from flask_login import login_user, logout_user, login_required, current_user
+
+from extensions import db
+from models import PasswordReset, User
+from ratelimit import limiter
+from utils import normalize_email
+from passwords import PasswordHasherBusy, password_hasher
+from totp_qr import MIMETYPES as QR_MIMETYPES, qr_etag, render_qr
+
+def get_dashboard_route(role):
+    return {
+        'admin': url_for('admin.admin_dashboard'),
+        'donor': url_for('donor.donor_dashboard'),
+        'receiver': url_for('receiver.receiver_dashboard')
+    }.get(role, url_for('public.index'))
+
+def throttled(retry_after, template):
+    """Re-render a form with 429 when too many attempts have been made"""
+    flash('Too many attempts. Please wait a few minutes and try again.', 'danger')
+    response = make_response(render_template(template), 429)
+    response.headers['Retry-After'] = str(int(retry_after) + 1)
+    return response
+
+def login():
+    if request.method == 'POST':
+        email = request.form['email']
+        password = request.form['password']
+
+        # Throttle before the user lookup and password hash
+        account = normalize_email(email)
+        retry_after = limiter.hit('login', ip=request.remote_addr, account=account)
+        if retry_after:
+            return throttled(retry_after, 'login.html')
+
+        user = User.query.filter(User.email_in([account])).first()
+        if user and password_hasher.verify(user.password_hash, password):
+            limiter.reset('login', account=account)
+            if password_hasher.needs_rehash(user.password_hash):
+                # Upgrade hashes made with older algorithm or cost settings
+                user.password_hash = password_hasher.hash(password)
+                db.session.commit()
+            if user.totp_enabled:
+                # Store user ID in session for 2FA verification
+                session['pending_user_id'] = user.id
+                return redirect(url_for('auth.verify_2fa'))
+            login_user(user)
+            return redirect(get_dashboard_route(user.role))
+        flash('Invalid email or password', 'danger')
+    return render_template('login.html')
+
+def verify_2fa():
+    if 'pending_user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    if request.method == 'POST':
+        retry_after = limiter.hit('verify_2fa', ip=request.remote_addr, account=session['pending_user_id'])
+        if retry_after:
+            return throttled(retry_after, 'verify_2fa.html')
+
+    user = User.query.get(session['pending_user_id'])
+    if not user:
+        return redirect(url_for('auth.login'))
+
+    if request.method == 'POST':
+        token = request.form.get('token')
+        if user.verify_totp(token):
+            limiter.reset('verify_2fa', account=user.id)
+            login_user(user)
+            session.pop('pending_user_id', None)
+            return redirect(get_dashboard_route(user.role))
+        flash('Invalid 2FA code', 'danger')
+
+    return render_template('verify_2fa.html')
+
+@login_required
+def setup_2fa():
+    if not current_user.totp_secret:
+        current_user.generate_totp_secret()
+        db.session.commit()
+
+    if request.method == 'POST':
+        token = request.form.get('token')
+        if current_user.verify_totp(token):
+            current_user.totp_enabled = True
+            db.session.commit()
+            flash('Two-factor authentication has been enabled', 'success')
+            return redirect(url_for('auth.profile'))
+        flash('Invalid 2FA code', 'danger')
+
+    # The QR code itself is served by setup_2fa_qr
+    return render_template('setup_2fa.html', secret=current_user.totp_secret)
+
+@login_required
+def setup_2fa_qr(fmt):
+    """QR code for the pending 2FA secret, cached per secret"""
+    if current_user.totp_enabled or not current_user.totp_secret:
+        abort(404)
+
+    uri = current_user.get_totp_uri()
+    response = make_response(render_qr(uri, fmt))
+    response.mimetype = QR_MIMETYPES[fmt]
+    # The image embeds the secret: browser cache only, never shared caches
+    response.cache_control.private = True
+    response.cache_control.max_age = 300
+    response.set_etag(qr_etag(uri, fmt))
+    return response.make_conditional(request)
+
+@login_required
+def disable_2fa():
+    current_user.totp_enabled = False
+    current_user.totp_secret = None
+    db.session.commit()
+    flash('Two-factor authentication has been disabled', 'success')
+    return redirect(url_for('auth.profile'))
+
+def register():
+    if request.method == 'POST':
+        try:
+            # Basic user information
+            user = User(
+                email=normalize_email(request.form['email']),
+                first_name=request.form['first_name'],
+                last_name=request.form['last_name'],
+                password_hash=password_hasher.hash(request.form['password']),
+                role=request.form.get('role', 'donor'),
+                # Additional profile information
+                blood_type=request.form.get('blood_type'),
+                phone=request.form.get('phone'),
+                address=request.form.get('address'),
+                gender=request.form.get('gender'),
+                date_of_birth=datetime.strptime(request.form.get('date_of_birth', ''), '%Y-%m-%d') if request.form.get('date_of_birth') else None
+            )
+
+            if User.query.filter(User.email_in([user.email])).first():
+                flash('Email already registered', 'danger')
+                return render_template('register.html')
+
+            db.session.add(user)
+            db.session.commit()
+            login_user(user)
+            flash('Registration successful!', 'success')
+            return redirect(get_dashboard_route(user.role))
+        except PasswordHasherBusy:
+            raise
+        except Exception as e:
+            logging.error(f"Registration error: {str(e)}")
+            flash('An error occurred during registration. Please try again.', 'danger')
+            return render_template('register.html')
+    return render_template('register.html')
+
+def forgot_password():
+    """Handle forgot password requests"""
+    if request.method == 'POST':
+        email = request.form.get('email')
+        
+        if not email:
+            flash('Please enter your email address.', 'danger')
+            return redirect(url_for('auth.forgot_password'))
+        
+        retry_after = limiter.hit('forgot_password', ip=request.remote_addr, account=normalize_email(email))
+        if retry_after:
+            return throttled(retry_after, 'forgot_password.html')
+        
+        user = User.query.filter(User.email_in([email])).first()
+        
+        # Even if the user doesn't exist, don't reveal this information
+        # to prevent email enumeration attacks
+        if user:
+            token = user.generate_password_reset_token()
+            
+            # In production, use the actual host
+            reset_url = request.host_url.rstrip('/') + url_for('auth.reset_password')
+            
+            from email_utils import send_password_reset_email
+            if send_password_reset_email(user, token, reset_url):
+                flash('Password reset instructions have been sent to your email.', 'success')
+            else:
+                flash('There was an error sending the password reset email. Please try again later.', 'danger')
+        else:
+            # Log this but don't tell the user (to prevent email enumeration)
+            logging.info(f"Password reset requested for non-existent email: {email}")
+            # Still show success message to prevent email enumeration
+            flash('If your email is registered, you will receive password reset instructions.', 'success')
+        
+        return redirect(url_for('auth.login'))
+    
+    return render_template('forgot_password.html')
+
+def reset_password():
+    """Handle password reset with token verification"""
+    token = request.args.get('token') or request.form.get('token')
+    
+    if not token:
+        flash('Invalid or missing reset token.', 'danger')
+        return redirect(url_for('auth.login'))
+    
+    # Find the reset token in the database
+    reset = PasswordReset.query.filter_by(token=token, used=False).first()
+    
+    if not reset or not reset.is_valid():
+        flash('The password reset link is invalid or has expired.', 'danger')
+        return redirect(url_for('auth.login'))
+    
+    user = User.query.get(reset.user_id)
+    
+    if not user:
+        flash('User account not found.', 'danger')
+        return redirect(url_for('auth.login'))
+    
+    if request.method == 'POST':
+        password = request.form.get('password')
+        confirm_password = request.form.get('confirm_password')
+        
+        if not password or len(password) < 8:
+            flash('Password must be at least 8 characters long.', 'danger')
+            return render_template('reset_password.html', token=token)
+        
+        if password != confirm_password:
+            flash('Passwords do not match.', 'danger')
+            return render_template('reset_password.html', token=token)
+        
+        # Update the user's password
+        user.password_hash = password_hasher.hash(password)
+        
+        # Invalidate the token
+        reset.invalidate()
+        
+        db.session.commit()
+        
+        flash('Your password has been reset successfully. You can now log in with your new password.', 'success')
+        return redirect(url_for('auth.login'))
+    
+    return render_template('reset_password.html', token=token)
+
+@login_required
+def profile():
+    return render_template('profile.html')
+
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('public.index'))
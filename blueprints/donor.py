@@ -0,0 +1,16 @@
+"""Donor dashboard, donations, verification uploads and document viewing"""
+
+from flask import Blueprint
+
+from blueprints import lazy_routes
+
+bp = Blueprint('donor', __name__)
+route = lazy_routes(bp, 'blueprints.donor_views')
+
+route('/donor', 'donor_dashboard')
+route('/donor/donations', 'donor_donation_history')
+route('/donate', 'donate', methods=['GET', 'POST'])
+route('/verify-donor', 'verify_donor', methods=['GET', 'POST'])
+route('/verification-status', 'verification_status')
+route('/view-document/<document_type>/<filename>', 'view_document')
+route('/view-document/<document_type>/<filename>/preview', 'view_document_preview')
@@ -0,0 +1,242 @@
+"""Views for donors: dashboard, donations, verification and documents"""
+
+import json
+import logging
+from datetime import datetime
+from flask import abort, current_app, render_template, request, redirect, url_for, flash, jsonify
+from flask_login import login_required, current_user
+from werkzeug.utils import secure_filename
+
+from extensions import db
+from models import Donation, DonorVerification
+from utils import donor_required, calculate_next_donation_date
+from dashboard_stats import get_donor_stats, invalidate_admin_stats
+from pagination import invalidate_counts, keyset_page, parse_keyset_args
+from storage import get_storage
+from documents import DOCUMENT_FIELDS, can_view_document, document_exists, record_documents
+from previews import IMAGE_EXTENSIONS, preview_filename, preview_subfolder, schedule_previews
+from metrics import DONATIONS, VERIFICATIONS
+
+def allowed_file(filename):
+    """Check if file has an allowed extension"""
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
+
+def save_file(file, subfolder):
+    """Stream file into document storage and return the stored filename"""
+    if file and allowed_file(file.filename):
+        return get_storage().save(file.stream, subfolder, secure_filename(file.filename))
+    return None
+
+def save_files(files):
+    """
+    Store several uploads concurrently.
+
+    Args:
+        files: dict mapping a key to (file, subfolder)
+
+    Returns:
+        dict: The same keys mapped to stored filenames, or None when a file
+        was missing or not allowed
+    """
+    uploads = {
+        key: (file.stream, subfolder, secure_filename(file.filename))
+        for key, (file, subfolder) in files.items()
+        if file and allowed_file(file.filename)
+    }
+    stored = get_storage().save_many(uploads)
+    return {key: stored.get(key) for key in files}
+
+def authorize_document(document_type, filename):
+    """Abort unless the current user may view the given uploaded document"""
+    # Security check: make sure only admins or the document owner can view documents
+    if document_type not in DOCUMENT_FIELDS:
+        abort(404)
+    
+    if not can_view_document(current_user, document_type, filename):
+        # Unknown documents are 404, other people's 403, as before the index
+        abort(403 if document_exists(document_type, filename) else 404)
+
+@login_required
+def donor_dashboard():
+    if current_user.role != 'donor':
+        return redirect(url_for('public.index'))
+    stats = get_donor_stats(current_user.id)
+    recent_donations = Donation.query.filter_by(donor_id=current_user.id).order_by(
+        Donation.donation_date.desc(), Donation.id.desc()
+    ).limit(5).all()
+    return render_template('donor_dashboard.html', recent_donations=recent_donations, **stats)
+
+@login_required
+@donor_required
+def donor_donation_history():
+    """Keyset-paginated donation history for the donor dashboard"""
+    before, before_id = parse_keyset_args(request.args)
+    donations, next_cursor = keyset_page(
+        Donation.query.filter_by(donor_id=current_user.id),
+        Donation.donation_date, Donation.id, 20, before, before_id
+    )
+    return jsonify({
+        'items': [{
+            'id': donation.id,
+            'donation_date': donation.donation_date.isoformat(),
+            'center': donation.center,
+            'units': donation.units,
+            'status': donation.status
+        } for donation in donations],
+        # Same markup as the dashboard's server-rendered rows
+        'html': render_template('partials/donation_history_rows.html', donations=donations),
+        'next': url_for('donor.donor_donation_history', **next_cursor) if next_cursor else None
+    })
+
+@login_required
+def donate():
+    if current_user.role != 'donor':
+        flash('Only donors can access this page.', 'warning')
+        return redirect(url_for('public.index'))
+    
+    # Check if donor is verified
+    if not current_user.is_verified:
+        flash('You need to be verified before you can donate blood. Please complete the verification process.', 'warning')
+        return redirect(url_for('donor.verify_donor'))
+    
+    # Check eligibility based on last donation date
+    can_donate, message = current_user.can_donate()
+    if not can_donate:
+        flash(message, 'warning')
+        return redirect(url_for('donor.donor_dashboard'))
+
+    if request.method == 'POST':
+        try:
+            donation = Donation(
+                donor_id=current_user.id,
+                blood_type=current_user.blood_type,
+                units=int(request.form['units']),
+                center=request.form['center'],
+                notes=request.form.get('notes', ''),
+                status='pending'  # Start with pending status
+            )
+            db.session.add(donation)
+            
+            # Update user's donation dates
+            current_user.last_donation_date = datetime.utcnow()
+            current_user.next_eligible_date = calculate_next_donation_date(current_user.last_donation_date)
+            
+            db.session.commit()
+            invalidate_admin_stats()
+            DONATIONS.inc()
+            flash('Donation recorded successfully! It will be verified by the blood bank.', 'success')
+            return redirect(url_for('donor.donor_dashboard'))
+        except Exception as e:
+            logging.error(f"Donation recording error: {str(e)}")
+            flash('An error occurred while recording the donation. Please try again.', 'danger')
+    return render_template('donate.html')
+
+@login_required
+@donor_required
+def verify_donor():
+    """Page for donors to submit verification documents"""
+    # Check if user already has a pending or approved verification
+    existing_verification = DonorVerification.query.filter(
+        DonorVerification.donor_id == current_user.id, 
+        DonorVerification.status.in_(['pending', 'approved'])
+    ).first()
+    
+    if existing_verification and existing_verification.status == 'approved':
+        flash('You are already verified!', 'info')
+        return redirect(url_for('donor.donor_dashboard'))
+    
+    if existing_verification and existing_verification.status == 'pending':
+        flash('Your verification is still being reviewed.', 'info')
+        return redirect(url_for('donor.verification_status'))
+    
+    if request.method == 'POST':
+        try:
+            # Handle file uploads
+            filenames = save_files({
+                'id_document': (request.files.get('id_document'), 'id_documents'),
+                'medical_certificate': (request.files.get('medical_certificate'), 'medical_certificates'),
+                'address_proof': (request.files.get('address_proof'), 'address_proofs'),
+            })
+            id_filename = filenames['id_document']
+            medical_filename = filenames['medical_certificate']
+            address_filename = filenames['address_proof']
+            
+            # Capture questionnaire responses
+            questionnaire_data = {
+                'recent_illness': request.form.get('recent_illness'),
+                'medication': request.form.get('medication'),
+                'last_donation': request.form.get('last_donation'),
+                'has_allergies': request.form.get('has_allergies'),
+                'allergies_details': request.form.get('allergies_details'),
+                'blood_transfusion': request.form.get('blood_transfusion'),
+                'recent_surgery': request.form.get('recent_surgery'),
+                'chronic_conditions': request.form.get('chronic_conditions'),
+                'travel_history': request.form.get('travel_history'),
+                'consented': request.form.get('consent') == 'on'
+            }
+            
+            # Create verification record
+            verification = DonorVerification(
+                donor_id=current_user.id,
+                status='pending',
+                id_document_filename=id_filename,
+                medical_certificate_filename=medical_filename,
+                address_proof_filename=address_filename,
+                questionnaire_responses=json.dumps(questionnaire_data)
+            )
+            
+            # Update user verification status
+            current_user.verification_status = 'pending'
+            
+            db.session.add(verification)
+            record_documents(verification)
+            db.session.commit()
+            invalidate_admin_stats()
+            invalidate_counts()
+            VERIFICATIONS.inc(status='submitted')
+            schedule_previews(get_storage(), [
+                ('id_documents', id_filename),
+                ('medical_certificates', medical_filename),
+                ('address_proofs', address_filename),
+            ])
+            
+            flash('Your verification documents have been submitted and will be reviewed shortly.', 'success')
+            return redirect(url_for('donor.verification_status'))
+            
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Verification submission error: {str(e)}")
+            flash('An error occurred while submitting your verification. Please try again.', 'danger')
+    
+    return render_template('verify_donor.html')
+
+@login_required
+@donor_required
+def verification_status():
+    """Page for donors to check their verification status"""
+    verification = DonorVerification.query.filter_by(donor_id=current_user.id).order_by(DonorVerification.submission_date.desc()).first()
+    
+    if not verification:
+        flash('You have not submitted any verification documents yet.', 'info')
+        return redirect(url_for('donor.verify_donor'))
+    
+    return render_template('verification_status.html', verification=verification)
+
+@login_required
+def view_document(document_type, filename):
+    """Route to view uploaded documents"""
+    authorize_document(document_type, filename)
+    return get_storage().send(document_type, filename)
+
+@login_required
+def view_document_preview(document_type, filename):
+    """Route to view the compressed preview of an uploaded document"""
+    authorize_document(document_type, filename)
+
+    if get_storage().exists(preview_subfolder(document_type), preview_filename(filename)):
+        return get_storage().send(preview_subfolder(document_type), preview_filename(filename))
+
+    # Preview not rendered yet: images fall back to the original, PDFs have nothing to show
+    if filename.rsplit('.', 1)[-1].lower() in IMAGE_EXTENSIONS:
+        return redirect(url_for('donor.view_document', document_type=document_type, filename=filename))
+    abort(404)
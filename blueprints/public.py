@@ -0,0 +1,17 @@
+"""Public information pages"""
+
+from flask import Blueprint
+
+from blueprints import lazy_routes
+
+bp = Blueprint('public', __name__)
+route = lazy_routes(bp, 'blueprints.public_views')
+
+route('/', 'index')
+route('/faq', 'faq')
+route('/contact', 'contact', methods=['GET', 'POST'])
+route('/teams', 'teams')
+route('/donation-tips', 'donation_tips')
+route('/blood-banks', 'blood_banks')
+route('/help-support', 'help_support')
+route('/can-i-give-blood', 'eligibility_check')
@@ -0,0 +1,31 @@
+"""Views for the public information pages"""
+
+from flask import render_template, request, redirect, url_for, flash
+
+def index():
+    return render_template('index.html')
+
+def faq():
+    return render_template('faq.html')
+
+def contact():
+    if request.method == 'POST':
+        # Here we'll just flash a message for now
+        flash('Thank you for your message. We will get back to you soon!', 'success')
+        return redirect(url_for('public.contact'))
+    return render_template('contact.html')
+
+def teams():
+    return render_template('teams.html')
+
+def donation_tips():
+    return render_template('donation_tips.html')
+
+def blood_banks():
+    return render_template('blood_banks.html')
+
+def help_support():
+    return render_template('help_support.html')
+
+def eligibility_check():
+    return render_template('eligibility_check.html')
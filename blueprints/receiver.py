@@ -0,0 +1,14 @@
+"""Receiver dashboard, blood requests and stock levels"""
+
+from flask import Blueprint
+
+from blueprints import lazy_routes
+
+bp = Blueprint('receiver', __name__)
+route = lazy_routes(bp, 'blueprints.receiver_views')
+
+route('/receiver', 'receiver_dashboard')
+route('/receiver/requests', 'receiver_request_history')
+route('/request-blood', 'request_blood', methods=['GET', 'POST'])
+route('/blood-requests', 'blood_requests')
+route('/api/blood-stock', 'blood_stock')
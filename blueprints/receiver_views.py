@@ -0,0 +1,108 @@
+"""Views for receivers: dashboard, blood requests and stock levels"""
+
+import logging
+from datetime import datetime
+from flask import current_app, render_template, request, redirect, url_for, flash, jsonify
+from flask_login import login_required, current_user
+from sqlalchemy.orm import raiseload
+
+from extensions import db
+from models import BloodRequest
+from utils import COMPATIBLE_RECIPIENT_TYPES, receiver_required
+from dashboard_stats import get_receiver_stats, invalidate_admin_stats
+from inventory import get_stock_snapshot
+from pagination import keyset_page, parse_keyset_args
+from notifications import schedule_fan_out
+from metrics import BLOOD_REQUESTS
+
+@login_required
+def receiver_dashboard():
+    if current_user.role != 'receiver':
+        return redirect(url_for('public.index'))
+    stats = get_receiver_stats(current_user.id)
+    recent_requests = BloodRequest.query.filter_by(requester_id=current_user.id).order_by(
+        BloodRequest.created_at.desc(), BloodRequest.id.desc()
+    ).limit(5).all()
+    return render_template('receiver_dashboard.html', recent_requests=recent_requests, **stats)
+
+@login_required
+@receiver_required
+def receiver_request_history():
+    """Keyset-paginated blood request history for the receiver dashboard"""
+    before, before_id = parse_keyset_args(request.args)
+    requests, next_cursor = keyset_page(
+        BloodRequest.query.filter_by(requester_id=current_user.id),
+        BloodRequest.created_at, BloodRequest.id, 20, before, before_id
+    )
+    return jsonify({
+        'items': [{
+            'id': blood_request.id,
+            'blood_type': blood_request.blood_type,
+            'units_needed': blood_request.units_needed,
+            'urgency': blood_request.urgency,
+            'status': blood_request.status,
+            'created_at': blood_request.created_at.isoformat(),
+            'required_by': blood_request.required_by.isoformat() if blood_request.required_by else None
+        } for blood_request in requests],
+        # Same markup, including the actions cell, as the dashboard's server-rendered rows
+        'html': render_template('partials/request_history_rows.html', requests=requests),
+        'next': url_for('receiver.receiver_request_history', **next_cursor) if next_cursor else None
+    })
+
+@login_required
+def request_blood():
+    if request.method == 'POST':
+        try:
+            blood_request = BloodRequest(
+                requester_id=current_user.id,
+                blood_type=request.form['blood_type'],
+                units_needed=int(request.form['units']),
+                urgency=request.form['urgency'],
+                hospital=request.form['hospital'],
+                notes=request.form.get('notes', ''),
+                required_by=datetime.strptime(request.form['required_by'], '%Y-%m-%d') if request.form.get('required_by') else None
+            )
+            db.session.add(blood_request)
+            db.session.commit()
+            invalidate_admin_stats()
+            BLOOD_REQUESTS.inc(urgency=blood_request.urgency)
+            schedule_fan_out(current_app._get_current_object(), blood_request, url_for('receiver.blood_requests', _external=True))
+            flash('Blood request created successfully!', 'success')
+            return redirect(url_for('receiver.receiver_dashboard'))
+        except Exception as e:
+            logging.error(f"Blood request creation error: {str(e)}")
+            flash('An error occurred while creating the request. Please try again.', 'danger')
+    return render_template('request_blood.html')
+
+@login_required
+def blood_requests():
+    next_cursor = None
+    # The list only shows request columns; raise rather than lazy-load per row
+    base_query = BloodRequest.query.options(raiseload('*'))
+    if current_user.role == 'admin':
+        requests = base_query.order_by(BloodRequest.created_at.desc()).all()
+    elif current_user.role == 'receiver':
+        requests = base_query.filter_by(requester_id=current_user.id).order_by(BloodRequest.created_at.desc()).all()
+    else:
+        # For donors, show open compatible requests based on their blood type,
+        # paged by (created_at, id) so deep pages stay on the composite index
+        compatible_types = COMPATIBLE_RECIPIENT_TYPES.get(current_user.blood_type, ())
+        query = base_query.filter(
+            BloodRequest.blood_type.in_(compatible_types),
+            BloodRequest.status == 'pending'
+        )
+        before, before_id = parse_keyset_args(request.args)
+        requests, next_cursor = keyset_page(
+            query, BloodRequest.created_at, BloodRequest.id, 20, before, before_id
+        )
+
+    return render_template('blood_requests.html', requests=requests, next_cursor=next_cursor)
+
+@login_required
+def blood_stock():
+    """Current stock levels per blood type, served with an ETag"""
+    response = jsonify(get_stock_snapshot(request.args.get('center')))
+    response.add_etag()
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
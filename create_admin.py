@@ -1,8 +1,10 @@
 from werkzeug.security import generate_password_hash
-from app import app, db
+from extensions import db
+from factory import create_app
 from models import User
 
 def create_admin():
+    app = create_app()
     with app.app_context():
         # Check if admin already exists
         admin = User.query.filter_by(email='admin@bloodbank.com').first()
@@ -0,0 +1,70 @@
+"""
+Dashboard statistics.
+
+All admin pending counters are computed in one aggregate query and cached
+for a short TTL. Routes that create or review verifications, donations and
+blood requests call invalidate_admin_stats() after committing. Donor and
+receiver totals are a single COUNT/SUM query each.
+"""
+
+from cache import TTLCache
+from extensions import db
+from models import BloodRequest, Donation, DonorVerification
+
+ADMIN_STATS_TTL = 30  # seconds
+
+_stats_cache = TTLCache(ttl=ADMIN_STATS_TTL, maxsize=1)
+
+def _pending_count(model):
+    return db.select(db.func.count()).select_from(model).where(model.status == 'pending').scalar_subquery()
+
+def _load_admin_stats():
+    row = db.session.execute(db.select(
+        _pending_count(DonorVerification).label('pending_verifications_count'),
+        _pending_count(BloodRequest).label('pending_requests_count'),
+        _pending_count(Donation).label('pending_donations_count'),
+    )).one()
+    return dict(row._mapping)
+
+def get_admin_stats():
+    """
+    Get the pending counters shown to admins.
+
+    Returns:
+        dict: pending_verifications_count, pending_requests_count and
+        pending_donations_count
+    """
+    return _stats_cache.get_or_set('admin_stats', _load_admin_stats)
+
+def invalidate_admin_stats():
+    """Drop cached counters after a write that changes them"""
+    _stats_cache.clear()
+
+def get_donor_stats(donor_id):
+    """
+    Get lifetime donation totals for a donor.
+
+    Returns:
+        dict: donation_count and units_donated
+    """
+    row = db.session.execute(db.select(
+        db.func.count(Donation.id).label('donation_count'),
+        db.func.coalesce(db.func.sum(Donation.units), 0).label('units_donated'),
+    ).where(Donation.donor_id == donor_id)).one()
+    return dict(row._mapping)
+
+def get_receiver_stats(requester_id):
+    """
+    Get blood request totals for a receiver.
+
+    Returns:
+        dict: request_count, pending_request_count, fulfilled_request_count
+        and units_requested
+    """
+    row = db.session.execute(db.select(
+        db.func.count(BloodRequest.id).label('request_count'),
+        db.func.count(BloodRequest.id).filter(BloodRequest.status == 'pending').label('pending_request_count'),
+        db.func.count(BloodRequest.id).filter(BloodRequest.status == 'fulfilled').label('fulfilled_request_count'),
+        db.func.coalesce(db.func.sum(BloodRequest.units_needed), 0).label('units_requested'),
+    ).where(BloodRequest.requester_id == requester_id)).one()
+    return dict(row._mapping)
@@ -0,0 +1,99 @@
+"""
+Ownership index for uploaded verification documents.
+
+Every stored document gets a VerificationDocument row keyed by
+(document_type, filename), so view_document can authorize with one indexed
+lookup instead of scanning the filename columns of DonorVerification.
+Results are cached briefly per user so paging through documents does not
+hit the database for every image.
+"""
+
+from cache import TTLCache
+from extensions import db
+from models import DonorVerification, VerificationDocument
+
+# Document type (upload subfolder) -> DonorVerification filename column
+DOCUMENT_FIELDS = {
+    'id_documents': 'id_document_filename',
+    'medical_certificates': 'medical_certificate_filename',
+    'address_proofs': 'address_proof_filename',
+}
+
+DOCUMENT_ACCESS_TTL = 300  # seconds
+
+_access_cache = TTLCache(ttl=DOCUMENT_ACCESS_TTL, maxsize=10000)
+
+def record_documents(verification):
+    """Add index rows for the documents attached to a new verification"""
+    for document_type, field in DOCUMENT_FIELDS.items():
+        filename = getattr(verification, field)
+        if filename:
+            db.session.add(VerificationDocument(
+                verification=verification,
+                donor_id=verification.donor_id,
+                document_type=document_type,
+                filename=filename
+            ))
+
+def _lookup_access(user, document_type, filename):
+    query = db.session.query(VerificationDocument.id).filter_by(
+        document_type=document_type, filename=filename
+    )
+    if user.role != 'admin':
+        query = query.filter_by(donor_id=user.id)
+    return query.first() is not None
+
+def document_exists(document_type, filename):
+    """Whether any verification has this document, whoever owns it"""
+    return db.session.query(VerificationDocument.id).filter_by(
+        document_type=document_type, filename=filename
+    ).first() is not None
+
+def can_view_document(user, document_type, filename):
+    """
+    Check whether a user may view a stored document.
+
+    Admins may view any indexed document; donors only their own.
+    """
+    if document_type not in DOCUMENT_FIELDS:
+        return False
+    # Admins share one cache entry per document. Only grants are cached, so
+    # a document indexed moments after a denied lookup is visible at once.
+    key = ('admin' if user.role == 'admin' else user.id, document_type, filename)
+    if _access_cache.get(key):
+        return True
+    allowed = _lookup_access(user, document_type, filename)
+    if allowed:
+        _access_cache.set(key, True)
+    return allowed
+
+def backfill_statements(first_id=None, last_id=None):
+    """
+    INSERT ... SELECT statements that index documents of existing verifications.
+
+    One statement per document type, skipping rows that are already indexed,
+    optionally limited to a DonorVerification id range so a migration can
+    run them in throttled batches.
+    """
+    statements = []
+    for document_type, field in DOCUMENT_FIELDS.items():
+        column = getattr(DonorVerification, field)
+        already_indexed = db.select(VerificationDocument.id).where(
+            VerificationDocument.verification_id == DonorVerification.id,
+            VerificationDocument.document_type == document_type
+        ).exists()
+        source = db.select(
+            DonorVerification.id,
+            DonorVerification.donor_id,
+            db.literal(document_type),
+            column
+        ).where(column.isnot(None), ~already_indexed)
+        if first_id is not None:
+            source = source.where(DonorVerification.id.between(first_id, last_id))
+
+        statements.append(
+            db.insert(VerificationDocument).from_select(
+                ['verification_id', 'donor_id', 'document_type', 'filename'], source
+            )
+        )
+    return statements
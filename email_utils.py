@@ -2,15 +2,180 @@
 
 import os
 import smtplib
+import time
+from datetime import datetime, timedelta
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Delivery retry policy for queued mail
+MAX_DELIVERY_ATTEMPTS = 5
+RETRY_BASE_DELAY = 30  # seconds, doubled after each failed attempt
+RETRY_MAX_DELAY = 3600
+# A claimed batch is retried if the worker has not finished it within this time
+CLAIM_LEASE = timedelta(minutes=5)
+
+EMAIL_TEMPLATE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'email')
+
+def get_smtp_settings():
+    """
+    Read SMTP configuration from the environment.
+
+    Leave SMTP_USERNAME empty and set SMTP_USE_TLS=false to deliver to a
+    local stand-in such as `python -m aiosmtpd -n -l localhost:1025`.
+    """
+    return {
+        'server': os.environ.get('SMTP_SERVER', 'smtp.gmail.com'),
+        'port': int(os.environ.get('SMTP_PORT', 587)),
+        'username': os.environ.get('SMTP_USERNAME', 'bloodbridge@example.com'),
+        'password': os.environ.get('SMTP_PASSWORD', 'your-password'),
+        'use_tls': os.environ.get('SMTP_USE_TLS', 'true').lower() != 'false',
+        'sender': os.environ.get('SENDER_EMAIL', 'bloodbridge@example.com'),
+    }
+
+def build_message(sender_email, recipient, subject, body_html, body_text=None):
+    """Build a multipart message with an optional plain text part"""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = f'BloodBridge <{sender_email}>'
+    msg['To'] = recipient
+    
+    # Attach text part if provided
+    if body_text:
+        msg.attach(MIMEText(body_text, 'plain'))
+    
+    # Attach HTML part
+    msg.attach(MIMEText(body_html, 'html'))
+    return msg
+
+class SMTPConnection:
+    """
+    A persistent, authenticated SMTP connection.
+
+    The connection is opened lazily and reopened once if the server has
+    dropped it, so a worker can send many messages over one login.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = settings or get_smtp_settings()
+        self._server = None
+
+    def _connect(self):
+        server = smtplib.SMTP(self.settings['server'], self.settings['port'], timeout=30)
+        if self.settings['use_tls']:
+            server.starttls()
+        if self.settings['username']:
+            server.login(self.settings['username'], self.settings['password'])
+        self._server = server
+
+    def send(self, recipient, subject, body_html, body_text=None):
+        msg = build_message(self.settings['sender'], recipient, subject, body_html, body_text)
+        if self._server is None:
+            self._connect()
+        try:
+            self._server.sendmail(self.settings['sender'], recipient, msg.as_string())
+        except smtplib.SMTPServerDisconnected:
+            self._connect()
+            self._server.sendmail(self.settings['sender'], recipient, msg.as_string())
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except smtplib.SMTPException:
+                pass
+            self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class EmailTemplateRegistry:
+    """
+    Compiled email templates, loaded once per process.
+
+    An email named `name` consists of `<name>.subject.txt`, `<name>.html` and
+    `<name>.txt` in the email template folder. All three parts are rendered
+    from one context.
+    """
+
+    def __init__(self, folder=EMAIL_TEMPLATE_FOLDER):
+        from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+        self.environment = Environment(
+            loader=FileSystemLoader(folder),
+            autoescape=select_autoescape(['html']),
+            auto_reload=False
+        )
+        self._compiled = {}
+
+    def get(self, name):
+        """Return the compiled (subject, html, text) templates and subject variables"""
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            from jinja2 import meta
+
+            source = self.environment.loader.get_source(self.environment, f'{name}.subject.txt')[0]
+            compiled = (
+                self.environment.get_template(f'{name}.subject.txt'),
+                self.environment.get_template(f'{name}.html'),
+                self.environment.get_template(f'{name}.txt'),
+                meta.find_undeclared_variables(self.environment.parse(source)),
+            )
+            self._compiled[name] = compiled
+        return compiled
+
+    def render(self, name, context):
+        """
+        Render one email.
+
+        Returns:
+            tuple: (subject, body_html, body_text)
+        """
+        subject, html, text, _ = self.get(name)
+        return subject.render(context).strip(), html.render(context), text.render(context)
+
+    def render_batch(self, name, shared_context, recipient_contexts):
+        """
+        Render one email for many recipients.
+
+        Templates are compiled once and reused for every recipient, whose
+        variables are layered over the shared context. A subject that only
+        uses shared variables is rendered once for the whole batch.
+
+        Args:
+            name: Email template name
+            shared_context: dict of variables common to every recipient
+            recipient_contexts: iterable of per-recipient dicts
+
+        Yields:
+            tuple: (subject, body_html, body_text) per recipient
+        """
+        subject, html, text, subject_variables = self.get(name)
+
+        def render(template, recipient):
+            return template.render(shared_context, **recipient)
+
+        shared_subject = None
+        if subject_variables <= shared_context.keys():
+            shared_subject = subject.render(shared_context).strip()
+
+        for recipient in recipient_contexts:
+            yield (
+                shared_subject if shared_subject is not None else render(subject, recipient).strip(),
+                render(html, recipient),
+                render(text, recipient),
+            )
+
+email_templates = EmailTemplateRegistry()
+
 def send_email(recipient, subject, body_html, body_text=None):
     """
-    Send an email using the configured SMTP server
+    Send an email immediately using the configured SMTP server
     
     Args:
         recipient: Email address of the recipient
@@ -21,43 +186,148 @@ def send_email(recipient, subject, body_html, body_text=None):
     Returns:
         bool: True if the email was sent successfully, False otherwise
     """
+    from metrics import EMAILS
+
     try:
-        # Email configuration - should be moved to environment variables
-        smtp_server = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
-        smtp_port = int(os.environ.get('SMTP_PORT', 587))
-        smtp_username = os.environ.get('SMTP_USERNAME', 'bloodbridge@example.com')
-        smtp_password = os.environ.get('SMTP_PASSWORD', 'your-password')
-        sender_email = os.environ.get('SENDER_EMAIL', 'bloodbridge@example.com')
-        
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = f'BloodBridge <{sender_email}>'
-        msg['To'] = recipient
-        
-        # Attach text part if provided
-        if body_text:
-            msg.attach(MIMEText(body_text, 'plain'))
-        
-        # Attach HTML part
-        msg.attach(MIMEText(body_html, 'html'))
-        
-        # Connect to server and send
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_username, smtp_password)
-            server.sendmail(sender_email, recipient, msg.as_string())
+        with SMTPConnection() as connection:
+            connection.send(recipient, subject, body_html, body_text)
         
         logger.info(f"Email sent to {recipient}")
+        EMAILS.inc(status='sent')
         return True
     
     except Exception as e:
         logger.error(f"Failed to send email to {recipient}: {str(e)}")
+        EMAILS.inc(status='failed')
         return False
 
+def queue_email(recipient, subject, body_html, body_text=None, commit=True):
+    """
+    Queue an email for delivery by the background worker
+    
+    Args:
+        recipient: Email address of the recipient
+        subject: Email subject
+        body_html: HTML content of the email
+        body_text: Plain text version (optional)
+        commit: Commit the session; pass False to batch many messages
+    
+    Returns:
+        bool: True if the email was queued successfully, False otherwise
+    """
+    from extensions import db
+    from models import OutboundEmail
+
+    try:
+        db.session.add(OutboundEmail(
+            recipient=recipient,
+            subject=subject,
+            body_html=body_html,
+            body_text=body_text
+        ))
+        if commit:
+            db.session.commit()
+        return True
+    except Exception as e:
+        logger.error(f"Failed to queue email to {recipient}: {str(e)}")
+        db.session.rollback()
+        return False
+
+def retry_delay(attempts):
+    """Exponential backoff after a failed delivery attempt"""
+    return timedelta(seconds=min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY))
+
+def claim_queued_emails(batch_size=50):
+    """
+    Lock and lease a batch of due messages for this worker.
+
+    Messages left in 'sending' by a crashed worker become due again once
+    their lease expires.
+    """
+    from extensions import db
+    from models import OutboundEmail
+
+    now = datetime.utcnow()
+    batch = OutboundEmail.query.filter(
+        OutboundEmail.status.in_(['queued', 'sending']),
+        OutboundEmail.next_attempt_at <= now
+    ).order_by(OutboundEmail.next_attempt_at).limit(batch_size).with_for_update(skip_locked=True).all()
+
+    for message in batch:
+        message.status = 'sending'
+        message.next_attempt_at = now + CLAIM_LEASE
+    db.session.commit()
+    return batch
+
+def deliver_queued_emails(connection, batch_size=50):
+    """
+    Deliver one batch of queued mail over an open SMTPConnection.
+
+    Returns:
+        tuple: (sent, failed) counts for the batch
+    """
+    from extensions import db
+
+    sent = failed = 0
+    for message in claim_queued_emails(batch_size):
+        message.attempts += 1
+        try:
+            connection.send(message.recipient, message.subject, message.body_html, message.body_text)
+            message.status = 'sent'
+            message.sent_at = datetime.utcnow()
+            message.last_error = None
+            sent += 1
+        except Exception as e:
+            failed += 1
+            message.last_error = str(e)
+            if message.attempts >= MAX_DELIVERY_ATTEMPTS:
+                message.status = 'failed'
+                logger.error(f"Giving up on email {message.id} to {message.recipient}: {str(e)}")
+            else:
+                message.status = 'queued'
+                message.next_attempt_at = datetime.utcnow() + retry_delay(message.attempts)
+                logger.warning(f"Email {message.id} to {message.recipient} failed, will retry: {str(e)}")
+            # Start the next message on a fresh connection
+            connection.close()
+    db.session.commit()
+    return sent, failed
+
+def run_email_worker(poll_interval=5, batch_size=50, stop_event=None):
+    """
+    Deliver queued mail until stop_event is set. Must run in an app context.
+
+    Args:
+        poll_interval: Seconds to sleep when the queue is empty
+        batch_size: Messages claimed per batch
+        stop_event: Optional threading.Event used to stop the loop
+    """
+    from extensions import db
+    from metrics import EMAILS, registry
+
+    with SMTPConnection() as connection:
+        while stop_event is None or not stop_event.is_set():
+            try:
+                sent, failed = deliver_queued_emails(connection, batch_size)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Email worker error: {str(e)}")
+                sent = failed = 0
+            if sent or failed:
+                logger.info(f"Email worker delivered {sent}, failed {failed}")
+                EMAILS.inc(sent, status='sent')
+                EMAILS.inc(failed, status='failed')
+            registry.flush()
+            if sent + failed < batch_size:
+                # Release the pooled DB connection while idle
+                db.session.remove()
+                if stop_event is not None:
+                    stop_event.wait(poll_interval)
+                else:
+                    time.sleep(poll_interval)
+
 def send_password_reset_email(user, token, reset_url):
     """
-    Send a password reset email to a user
+    Queue a password reset email to a user
     
     Args:
         user: User object
@@ -65,65 +335,13 @@ def send_password_reset_email(user, token, reset_url):
         reset_url: Base URL for password reset (e.g., https://example.com/reset-password)
     
     Returns:
-        bool: True if the email was sent successfully
+        bool: True if the email was queued successfully
     """
     reset_link = f"{reset_url}?token={token}"
     
-    subject = "Reset Your BloodBridge Password"
-    
-    # HTML version
-    html_content = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-        <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-            <div style="text-align: center; margin-bottom: 20px;">
-                <h2 style="color: #dc3545;">BloodBridge</h2>
-            </div>
-            
-            <div style="background-color: #f8f9fa; padding: 20px; border-radius: 5px;">
-                <h3>Hello {user.first_name},</h3>
-                
-                <p>We received a request to reset your password for your BloodBridge account.</p>
-                
-                <p>To reset your password, please click the button below:</p>
-                
-                <div style="text-align: center; margin: 30px 0;">
-                    <a href="{reset_link}" style="background-color: #dc3545; color: white; padding: 12px 25px; text-decoration: none; border-radius: 4px; font-weight: bold;">Reset Password</a>
-                </div>
-                
-                <p>If you didn't request this password reset, you can ignore this email and your password will remain unchanged.</p>
-                
-                <p>This password reset link will expire in 24 hours.</p>
-                
-                <p>Thank you,<br>
-                The BloodBridge Team</p>
-            </div>
-            
-            <div style="margin-top: 20px; font-size: 12px; color: #6c757d; text-align: center;">
-                <p>If you're having trouble clicking the button, copy and paste the URL below into your web browser:</p>
-                <p style="word-break: break-all;">{reset_link}</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    # Plain text version
-    text_content = f"""
-    Hello {user.first_name},
-    
-    We received a request to reset your password for your BloodBridge account.
-    
-    To reset your password, please visit the link below:
-    
-    {reset_link}
-    
-    If you didn't request this password reset, you can ignore this email and your password will remain unchanged.
-    
-    This password reset link will expire in 24 hours.
-    
-    Thank you,
-    The BloodBridge Team
-    """
+    subject, html_content, text_content = email_templates.render('password_reset', {
+        'first_name': user.first_name,
+        'reset_link': reset_link
+    })
     
-    return send_email(user.email, subject, html_content, text_content)
\ No newline at end of file
+    return queue_email(user.email, subject, html_content, text_content)
@@ -0,0 +1,21 @@
+"""
+Background worker that delivers queued email for the BloodBridge System.
+
+Run one or more alongside the web workers:
+
+    python email_worker.py
+"""
+
+import logging
+
+from email_utils import run_email_worker
+from factory import create_app
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+if __name__ == '__main__':
+    # The worker needs the database and config, not the web routes
+    app = create_app()
+    with app.app_context():
+        run_email_worker()
@@ -0,0 +1,112 @@
+"""
+Streaming admin exports.
+
+Rows are read in batches through iter_batches() and encoded batch by batch
+as CSV or NDJSON, optionally gzip-compressed as they go, so an export of
+any size is sent as a chunked response with flat memory use.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+
+from batching import iter_batches
+from extensions import db
+from models import BloodRequest, Donation, User
+
+EXPORT_BATCH_SIZE = 5000
+
+# Dataset -> (id column, exported columns). User exports leave out password
+# hashes, 2FA secrets and free-text medical details.
+EXPORTS = {
+    'donations': (Donation.id, (
+        Donation.id, Donation.donor_id, Donation.blood_type, Donation.units,
+        Donation.center, Donation.status, Donation.donation_date,
+    )),
+    'blood-requests': (BloodRequest.id, (
+        BloodRequest.id, BloodRequest.requester_id, BloodRequest.blood_type,
+        BloodRequest.units_needed, BloodRequest.urgency, BloodRequest.status,
+        BloodRequest.hospital, BloodRequest.required_by, BloodRequest.created_at,
+        BloodRequest.fulfilled_center,
+    )),
+    'users': (User.id, (
+        User.id, User.email, User.first_name, User.last_name, User.role,
+        User.blood_type, User.phone, User.is_available, User.is_verified,
+        User.verification_status, User.created_at, User.last_donation_date,
+        User.next_eligible_date,
+    )),
+}
+
+MIMETYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+# Leading characters that make spreadsheets evaluate a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+def _spreadsheet_safe(value):
+    """Quote user-supplied text that a spreadsheet would run as a formula"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def encode_csv(header, batches):
+    # CSV exports are opened in spreadsheets, so names, hospitals, centers
+    # etc. are neutralized; NDJSON is for programs and stays raw
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for batch in batches:
+        writer.writerows([_spreadsheet_safe(value) for value in row] for row in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def encode_ndjson(header, batches):
+    for batch in batches:
+        yield ''.join(
+            json.dumps(dict(zip(header, row)), default=_json_default) + '\n' for row in batch
+        ).encode()
+
+ENCODERS = {
+    'csv': encode_csv,
+    'ndjson': encode_ndjson,
+}
+
+def gzip_chunks(chunks, level=6):
+    """Compress a byte stream incrementally into gzip format"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def export_rows(dataset, fmt, compress=False, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Generate an export of a dataset as encoded byte chunks.
+
+    Args:
+        dataset: Key of EXPORTS
+        fmt: 'csv' or 'ndjson'
+        compress: Gzip the output on the fly
+        batch_size: Rows fetched and encoded per chunk
+
+    Returns:
+        generator: bytes chunks; must be consumed within an app context
+    """
+    id_column, columns = EXPORTS[dataset]
+    header = [column.key for column in columns]
+    batches = iter_batches(db.select(*columns), id_column, batch_size)
+    chunks = ENCODERS[fmt](header, batches)
+    return gzip_chunks(chunks) if compress else chunks
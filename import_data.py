@@ -0,0 +1,304 @@
+"""
+Bulk importer for partner blood bank data.
+
+    python import_data.py donors donors.csv
+    python import_data.py donations donations.csv --rejects rejected.csv
+
+Donor CSV columns: email, first_name, last_name, blood_type, phone, address,
+gender, date_of_birth, last_donation_date (only email and names required).
+Imported donors have no password; they set one through "Forgot password".
+Emails are stored lowercased and matched case-insensitively, as at login.
+
+Donation CSV columns: email, donation_date, units, center, blood_type,
+status (blood_type defaults to the donor's, status to 'completed').
+Historical donations update each donor's last donation and eligibility
+dates, and completed ones are added to blood stock in the same transaction,
+as if they had been completed in the app.
+
+Rows are read as a stream and handled in batches: each batch is validated
+in memory, checked against existing data with one set-based query and
+written with a single multi-row INSERT, then committed. Running web workers
+pick up imported users once their short-lived caches expire.
+"""
+
+import argparse
+import csv
+import itertools
+import logging
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from extensions import db
+from inventory import UNASSIGNED_CENTER, adjust_stock
+from models import Donation, User
+from utils import BLOOD_TYPES, calculate_next_donation_date, normalize_email, validate_email
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S')
+DONATION_STATUSES = {'pending', 'completed', 'cancelled'}
+
+class RowError(ValueError):
+    """A row that cannot be imported"""
+
+def _clean(row, field):
+    value = (row.get(field) or '').strip()
+    return value or None
+
+def _parse_date(value, field):
+    if value is None:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise RowError(f"invalid {field} '{value}'")
+
+def _parse_email(row):
+    email = _clean(row, 'email')
+    if not email or not validate_email(email):
+        raise RowError(f"invalid email '{email or ''}'")
+    return normalize_email(email)
+
+def _parse_blood_type(row):
+    blood_type = _clean(row, 'blood_type')
+    if blood_type is not None:
+        blood_type = blood_type.upper()
+        if blood_type not in BLOOD_TYPES:
+            raise RowError(f"invalid blood_type '{blood_type}'")
+    return blood_type
+
+def parse_donor(row, now):
+    """Validate a donor row and build its insert values"""
+    email = _parse_email(row)
+    first_name, last_name = _clean(row, 'first_name'), _clean(row, 'last_name')
+    if not first_name or not last_name:
+        raise RowError('first_name and last_name are required')
+    date_of_birth = _parse_date(_clean(row, 'date_of_birth'), 'date_of_birth')
+    last_donation = _parse_date(_clean(row, 'last_donation_date'), 'last_donation_date')
+    return {
+        'email': email,
+        'first_name': first_name,
+        'last_name': last_name,
+        'role': 'donor',
+        'blood_type': _parse_blood_type(row),
+        'phone': _clean(row, 'phone'),
+        'address': _clean(row, 'address'),
+        'gender': _clean(row, 'gender'),
+        'date_of_birth': date_of_birth.date() if date_of_birth else None,
+        'is_available': True,
+        'created_at': now,
+        'totp_enabled': False,
+        'is_verified': False,
+        'verification_status': 'unverified',
+        'last_donation_date': last_donation,
+        'next_eligible_date': calculate_next_donation_date(last_donation) if last_donation else None,
+    }
+
+def parse_donation(row):
+    """Validate a donation row; donor_id is filled in once donors are looked up"""
+    units = _clean(row, 'units') or '1'
+    if not units.isdigit() or int(units) < 1:
+        raise RowError(f"invalid units '{units}'")
+    status = (_clean(row, 'status') or 'completed').lower()
+    if status not in DONATION_STATUSES:
+        raise RowError(f"invalid status '{status}'")
+    donation_date = _parse_date(_clean(row, 'donation_date'), 'donation_date')
+    if donation_date is None:
+        raise RowError('donation_date is required')
+    return {
+        'email': _parse_email(row),
+        'blood_type': _parse_blood_type(row),
+        'units': int(units),
+        'center': _clean(row, 'center'),
+        'status': status,
+        'donation_date': donation_date,
+    }
+
+def _existing_emails(emails):
+    rows = db.session.execute(db.select(User.email).where(User.email_in(emails)))
+    return {normalize_email(email) for email, in rows}
+
+def import_donor_batch(rows, seen, now):
+    """
+    Insert one batch of donor rows.
+
+    Returns:
+        tuple: (inserted, rejected) where rejected is a list of (row, reason)
+    """
+    parsed, rejected = [], []
+    for row in rows:
+        try:
+            values = parse_donor(row, now)
+        except RowError as e:
+            rejected.append((row, str(e)))
+            continue
+        if values['email'] in seen:
+            rejected.append((row, 'duplicate email in file'))
+            continue
+        seen.add(values['email'])
+        parsed.append((row, values))
+
+    existing = _existing_emails([values['email'] for _, values in parsed]) if parsed else set()
+    inserts = []
+    for row, values in parsed:
+        if values['email'] in existing:
+            rejected.append((row, 'email already registered'))
+        else:
+            inserts.append(values)
+
+    if inserts:
+        db.session.execute(db.insert(User), inserts)
+    db.session.commit()
+    return len(inserts), rejected
+
+def import_donation_batch(rows, now):
+    """
+    Insert one batch of donation rows and move donors' last donation dates forward.
+
+    Returns:
+        tuple: (inserted, rejected) where rejected is a list of (row, reason)
+    """
+    parsed, rejected = [], []
+    for row in rows:
+        try:
+            parsed.append((row, parse_donation(row)))
+        except RowError as e:
+            rejected.append((row, str(e)))
+
+    donors = {}
+    if parsed:
+        emails = {values['email'] for _, values in parsed}
+        donors = {
+            normalize_email(email): (donor_id, blood_type, last_donation)
+            for donor_id, email, blood_type, last_donation in db.session.execute(
+                db.select(User.id, User.email, User.blood_type, User.last_donation_date)
+                .where(User.email_in(emails))
+            )
+        }
+
+    inserts = []
+    latest = {}
+    for row, values in parsed:
+        donor = donors.get(values.pop('email'))
+        if donor is None:
+            rejected.append((row, 'no donor with this email'))
+            continue
+        donor_id, donor_blood_type, last_donation = donor
+        values['donor_id'] = donor_id
+        values['blood_type'] = values['blood_type'] or donor_blood_type
+        if values['blood_type'] is None:
+            rejected.append((row, 'blood_type unknown for donor'))
+            continue
+        inserts.append(values)
+        if values['status'] == 'completed' and values['donation_date'] <= now:
+            current = latest.get(donor_id, last_donation)
+            if current is None or values['donation_date'] > current:
+                latest[donor_id] = values['donation_date']
+
+    if inserts:
+        db.session.execute(db.insert(Donation), inserts)
+        # Core inserts skip the inventory flush hook, so add completed units
+        # here; cancelling one later through the ORM takes them back out
+        stock = defaultdict(int)
+        for values in inserts:
+            if values['status'] == 'completed':
+                stock[(values['center'] or UNASSIGNED_CENTER, values['blood_type'])] += values['units']
+        adjust_stock(db.session, stock)
+    # latest only holds donors whose stored last donation date moves forward
+    updates = [
+        {'id': donor_id, 'last_donation_date': date, 'next_eligible_date': calculate_next_donation_date(date)}
+        for donor_id, date in latest.items()
+    ]
+    if updates:
+        # ORM bulk UPDATE by primary key: one executemany per batch
+        db.session.execute(db.update(User), updates)
+    db.session.commit()
+    return len(inserts), rejected
+
+def run_import(kind, path, batch_size=DEFAULT_BATCH_SIZE, rejects_path=None):
+    """
+    Stream a CSV file into the database in batches.
+
+    Returns:
+        tuple: (inserted, rejected) row counts
+    """
+    inserted = rejected_count = 0
+    started = time.perf_counter()
+    seen = set()
+    now = datetime.utcnow()
+
+    rejects_file = open(rejects_path, 'w', newline='') if rejects_path else None
+    rejects_writer = None
+    try:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames is None:
+                logger.info(f"{path} is empty, nothing to import")
+                return 0, 0
+            if rejects_file:
+                # Extra fields of over-long rows are reported, not written
+                rejects_writer = csv.DictWriter(rejects_file, fieldnames=[*reader.fieldnames, 'error'],
+                                                extrasaction='ignore')
+                rejects_writer.writeheader()
+
+            while True:
+                batch = list(itertools.islice(reader, batch_size))
+                if not batch:
+                    break
+                # DictReader files fields beyond the header under the None key
+                malformed = [(row, 'more fields than the header') for row in batch if None in row]
+                if malformed:
+                    batch = [row for row in batch if None not in row]
+                try:
+                    if kind == 'donors':
+                        count, rejected = import_donor_batch(batch, seen, now)
+                    else:
+                        count, rejected = import_donation_batch(batch, now)
+                except Exception:
+                    db.session.rollback()
+                    raise
+                rejected = malformed + rejected
+
+                inserted += count
+                rejected_count += len(rejected)
+                for row, reason in rejected:
+                    if rejects_writer:
+                        rejects_writer.writerow({**row, 'error': reason})
+                    else:
+                        logger.warning(f"Line {reader.line_num}: skipped row for '{row.get('email')}': {reason}")
+
+                elapsed = time.perf_counter() - started
+                logger.info(f"{inserted} {kind} imported, {rejected_count} rejected "
+                            f"({(inserted + rejected_count) / elapsed:.0f} rows/s)")
+    finally:
+        if rejects_file:
+            rejects_file.close()
+    return inserted, rejected_count
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk import donors or historical donations from CSV')
+    parser.add_argument('kind', choices=('donors', 'donations'))
+    parser.add_argument('path', help='CSV file with a header row')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--rejects', help='Write rejected rows with the reason to this CSV file')
+    args = parser.parse_args()
+
+    from factory import create_app
+    with create_app().app_context():
+        try:
+            inserted, rejected = run_import(args.kind, args.path, args.batch_size, args.rejects)
+        except Exception as e:
+            logger.error(f"Import failed: {str(e)}")
+            return 1
+    print(f"Imported {inserted} {args.kind}; {rejected} rows rejected.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
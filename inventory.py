@@ -0,0 +1,225 @@
+"""
+Blood stock inventory.
+
+Stock levels live in the BloodStock table, one row per (center, blood type).
+They are adjusted incrementally in a before_flush hook whenever a Donation
+enters or leaves the 'completed' status or a BloodRequest enters or leaves
+'fulfilled', so reads never have to SUM over the donations table. The hook is
+registered on import, so views that change those statuses import this module.
+
+Stock never goes negative: issuing more units than a center holds raises
+InsufficientStock from the flush, which rolls the whole change back.
+Existing history is turned into stock rows by migration 0006.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import event, inspect, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import BloodRequest, BloodStock, Donation
+from utils import BLOOD_TYPES
+
+# Center recorded for donations and fulfilments that do not name one
+UNASSIGNED_CENTER = 'Unassigned'
+
+# Target units per blood type across all centers, shown on the stock chart
+OPTIMAL_STOCK_UNITS = {
+    'A+': 100, 'A-': 70, 'B+': 100, 'B-': 60,
+    'AB+': 50, 'AB-': 40, 'O+': 120, 'O-': 80,
+}
+
+class InsufficientStock(ValueError):
+    """A center does not hold enough units of a blood type"""
+
+    def __init__(self, center, blood_type, units):
+        super().__init__(f"{center} does not have {units} unit(s) of {blood_type} in stock")
+        self.center = center
+        self.blood_type = blood_type
+        self.units = units
+
+def _status_change(obj, deleted=False):
+    """Return (old_status, new_status) for a pending flush, or None if unchanged"""
+    history = inspect(obj).attrs.status.history
+    if deleted:
+        old = history.deleted[0] if history.deleted else obj.status
+        return old, None
+    if not history.has_changes():
+        return None
+    old = history.deleted[0] if history.deleted else None
+    new = history.added[0] if history.added else None
+    return old, new
+
+def _stock_delta(obj, change):
+    """Units added to (positive) or issued from (negative) stock by a status change"""
+    old, new = change
+    if isinstance(obj, Donation):
+        sign = (new == 'completed') - (old == 'completed')
+        return obj.center or UNASSIGNED_CENTER, sign * (obj.units or 0)
+    sign = (old == 'fulfilled') - (new == 'fulfilled')
+    return obj.fulfilled_center or UNASSIGNED_CENTER, sign * (obj.units_needed or 0)
+
+_UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+def _add_units(session, center, blood_type, units, now):
+    """Add units to a stock row, creating it if needed, in one atomic statement"""
+    table = BloodStock.__table__
+    values = {'center': center, 'blood_type': blood_type, 'units': units, 'updated_at': now}
+    insert = _UPSERT_INSERTS.get(session.get_bind().dialect.name)
+    if insert is not None:
+        statement = insert(table).values(**values)
+        session.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.center, table.c.blood_type],
+            set_={'units': table.c.units + statement.excluded.units, 'updated_at': now}
+        ))
+        return
+
+    # No native upsert: a concurrent first insert loses on the unique
+    # constraint and falls back to incrementing the row the winner created
+    try:
+        with session.begin_nested():
+            session.execute(table.insert().values(**values))
+    except IntegrityError:
+        session.execute(
+            update(table)
+            .where(table.c.center == center, table.c.blood_type == blood_type)
+            .values(units=table.c.units + units, updated_at=now)
+        )
+
+def _issue_units(session, center, blood_type, units, now):
+    """Take units out of a stock row, raising InsufficientStock if it holds fewer"""
+    table = BloodStock.__table__
+    # The guard is evaluated under the row lock the UPDATE takes, so
+    # concurrent issues from the same row cannot overdraw it
+    result = session.execute(
+        update(table)
+        .where(table.c.center == center, table.c.blood_type == blood_type, table.c.units >= units)
+        .values(units=table.c.units - units, updated_at=now)
+    )
+    if result.rowcount != 1:
+        raise InsufficientStock(center, blood_type, units)
+
+def adjust_stock(session, deltas):
+    """Apply {(center, blood_type): units} deltas as atomic increments"""
+    now = datetime.utcnow()
+    # Sorted so concurrent flushes lock rows in the same order
+    for (center, blood_type), delta in sorted(deltas.items()):
+        if delta > 0:
+            _add_units(session, center, blood_type, delta, now)
+        elif delta < 0:
+            _issue_units(session, center, blood_type, -delta, now)
+
+@event.listens_for(Session, 'before_flush')
+def _track_stock_changes(session, flush_context, instances):
+    deltas = defaultdict(int)
+    tracked = (Donation, BloodRequest)
+
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, tracked):
+            change = _status_change(obj)
+            if change:
+                center, delta = _stock_delta(obj, change)
+                deltas[(center, obj.blood_type)] += delta
+
+    for obj in session.deleted:
+        if isinstance(obj, tracked):
+            center, delta = _stock_delta(obj, _status_change(obj, deleted=True))
+            deltas[(center, obj.blood_type)] += delta
+
+    if deltas:
+        adjust_stock(session, deltas)
+
+def get_stock_snapshot(center=None):
+    """
+    Current stock per blood type, optionally limited to one center.
+
+    Returns:
+        dict: blood_types, current and optimal unit lists in BLOOD_TYPES order,
+        and the time of the latest stock change
+    """
+    query = db.session.query(
+        BloodStock.blood_type,
+        db.func.sum(BloodStock.units),
+        db.func.max(BloodStock.updated_at)
+    ).group_by(BloodStock.blood_type)
+    if center:
+        query = query.filter(BloodStock.center == center)
+
+    units = {}
+    updated_at = None
+    for blood_type, total, last_change in query:
+        units[blood_type] = int(total or 0)
+        if last_change and (updated_at is None or last_change > updated_at):
+            updated_at = last_change
+
+    return {
+        'center': center,
+        'blood_types': list(BLOOD_TYPES),
+        'current': [units.get(blood_type, 0) for blood_type in BLOOD_TYPES],
+        'optimal': [OPTIMAL_STOCK_UNITS[blood_type] for blood_type in BLOOD_TYPES],
+        'updated_at': updated_at.isoformat() if updated_at else None,
+    }
+
+def rebuild_stock(connection):
+    """
+    Recompute every stock row from completed donations and fulfilled requests.
+
+    This is a full scan and is only meant for the initial backfill or repair;
+    normal operation relies on the incremental before_flush hook. Requests
+    fulfilled before fulfilled_center existed are charged to
+    UNASSIGNED_CENTER, which can leave that row negative while the totals
+    per blood type stay right.
+
+    Args:
+        connection: Connection to run on, inside the caller's transaction
+
+    Returns:
+        int: Number of stock rows written
+    """
+    donation, blood_request = Donation.__table__, BloodRequest.__table__
+    totals = defaultdict(int)
+    donations = connection.execute(
+        db.select(donation.c.center, donation.c.blood_type, db.func.sum(donation.c.units))
+        .where(donation.c.status == 'completed')
+        .group_by(donation.c.center, donation.c.blood_type)
+    )
+    for center, blood_type, units in donations:
+        totals[(center or UNASSIGNED_CENTER, blood_type)] += int(units or 0)
+
+    issued = connection.execute(
+        db.select(blood_request.c.fulfilled_center, blood_request.c.blood_type,
+                  db.func.sum(blood_request.c.units_needed))
+        .where(blood_request.c.status == 'fulfilled')
+        .group_by(blood_request.c.fulfilled_center, blood_request.c.blood_type)
+    )
+    for center, blood_type, units in issued:
+        totals[(center or UNASSIGNED_CENTER, blood_type)] -= int(units or 0)
+
+    now = datetime.utcnow()
+    connection.execute(BloodStock.__table__.delete())
+    rows = [
+        {'center': center, 'blood_type': blood_type, 'units': units, 'updated_at': now}
+        for (center, blood_type), units in sorted(totals.items())
+    ]
+    if rows:
+        connection.execute(BloodStock.__table__.insert(), rows)
+    return len(rows)
+
+def stock_by_blood_type():
+    """
+    Centers holding stock, per blood type, for choosing where to issue from.
+
+    Returns:
+        dict: blood type -> list of (center, units), largest stock first
+    """
+    rows = db.session.query(BloodStock.blood_type, BloodStock.center, BloodStock.units).filter(
+        BloodStock.units > 0
+    ).order_by(BloodStock.blood_type, BloodStock.units.desc(), BloodStock.center)
+    centers = defaultdict(list)
+    for blood_type, center, units in rows:
+        centers[blood_type].append((center, units))
+    return dict(centers)
@@ -0,0 +1,109 @@
+"""
+Donor matching for blood requests.
+
+Finds verified, available and currently eligible donors whose blood type can
+give to a request, ranked by how long they have been eligible.
+
+ix_user_donor_rank (migration 0007) holds each blood type's candidates in
+rank order, so a page is built by reading a few rows per compatible type in
+index order and merging them, rather than sorting every candidate.
+"""
+
+import heapq
+import itertools
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import load_only
+
+from extensions import db
+from models import User
+from utils import COMPATIBLE_DONOR_TYPES
+
+# Requests needed within this window are treated like emergencies
+URGENT_WINDOW = timedelta(hours=48)
+
+# Columns a caller needs to contact and rank a candidate
+CANDIDATE_COLUMNS = (
+    User.id, User.email, User.first_name, User.last_name, User.phone,
+    User.blood_type, User.last_donation_date, User.next_eligible_date,
+)
+
+def is_time_critical(blood_request, now=None):
+    """Check whether a request should draw on every compatible donor."""
+    now = now or datetime.utcnow()
+    if blood_request.urgency == 'emergency':
+        return True
+    return blood_request.required_by is not None and blood_request.required_by - now <= URGENT_WINDOW
+
+def matching_donor_criteria(blood_request, now=None):
+    """Filter clauses selecting donors who can give to a blood request right now"""
+    now = now or datetime.utcnow()
+    donor_types = COMPATIBLE_DONOR_TYPES.get(blood_request.blood_type, ())
+    return [
+        User.role == 'donor',
+        User.blood_type.in_(donor_types),
+        # "= true" rather than "IS true", which PostgreSQL cannot match to an index
+        User.is_available == db.true(),
+        User.is_verified == db.true(),
+        User.verification_status == 'approved',
+        db.or_(User.next_eligible_date.is_(None), User.next_eligible_date <= now),
+    ]
+
+# Ranking within one blood type; matches the tail of ix_user_donor_rank
+RANK_ORDER = (
+    User.next_eligible_date.asc().nulls_first(),
+    User.last_donation_date.asc().nulls_first(),
+    User.id,
+)
+
+def _rank_key(donor):
+    """Python mirror of RANK_ORDER: NULL dates first, then oldest first"""
+    return (
+        donor.next_eligible_date is not None, donor.next_eligible_date or datetime.min,
+        donor.last_donation_date is not None, donor.last_donation_date or datetime.min,
+        donor.id,
+    )
+
+def matching_donors_query(blood_request, donor_type, now=None):
+    """
+    Build the ranked candidate query for one compatible donor type.
+
+    With a single blood type the filter is all equalities on the leading
+    index columns, so rows come back in RANK_ORDER straight from the index.
+    """
+    now = now or datetime.utcnow()
+    return User.query.options(load_only(*CANDIDATE_COLUMNS)).filter(
+        *matching_donor_criteria(blood_request, now)
+    ).filter(User.blood_type == donor_type).order_by(*RANK_ORDER)
+
+def find_matching_donors(blood_request, page=1, per_page=20, now=None):
+    """
+    Return one page of ranked donor candidates for a blood request.
+
+    Normal requests prefer exact type matches so universal donors are kept
+    for emergencies; time-critical requests rank all compatible types
+    equally. Donors who have been eligible longest come first.
+
+    Each compatible type contributes at most the rows up to the end of the
+    requested page, read in index order, and the streams are merged.
+
+    Returns:
+        tuple: (donors, has_more)
+    """
+    now = now or datetime.utcnow()
+    page = max(page, 1)
+    offset = (page - 1) * per_page
+    limit = offset + per_page + 1
+
+    streams = {
+        donor_type: matching_donors_query(blood_request, donor_type, now).limit(limit).all()
+        for donor_type in COMPATIBLE_DONOR_TYPES.get(blood_request.blood_type, ())
+    }
+    if is_time_critical(blood_request, now):
+        ranked = heapq.merge(*streams.values(), key=_rank_key)
+    else:
+        exact = streams.pop(blood_request.blood_type, [])
+        ranked = itertools.chain(exact, heapq.merge(*streams.values(), key=_rank_key))
+
+    rows = list(itertools.islice(ranked, offset, limit))
+    return rows[:per_page], len(rows) > per_page
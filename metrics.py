@@ -0,0 +1,372 @@
+"""
+Built-in metrics registry with a Prometheus text exposition endpoint.
+
+Each thread updates its own shard of every metric, so recording a sample
+takes no lock; shards are summed when /metrics is scraped. When
+METRICS_MULTIPROC_DIR is set, every worker process periodically writes its
+totals to a file in that directory and a scrape of any worker merges the
+files, so counters cover the whole pool. Snapshot files are named by PID
+and a per-process id, so a new process that reuses a PID starts its own
+file. When a process has exited, a scrape folds its counters and histograms
+into a single archive file and deletes its snapshot; its gauges are dropped.
+"""
+
+import atexit
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+
+from flask import Response, abort, g, request
+from sqlalchemy.pool import QueuePool
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+FLUSH_INTERVAL = 5  # seconds between snapshot writes in multi-process mode
+ARCHIVE_FILENAME = 'archived.json'  # counters of processes that have exited
+ARCHIVE_LOCK_FILENAME = 'archived.lock'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
+class _Shards:
+    """Per-thread value maps that are merged when collected"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._live = []
+        self._retired = {}
+
+    def values(self):
+        shard = getattr(self._local, 'values', None)
+        if shard is None:
+            shard = self._local.values = {}
+            with self._lock:
+                self._retire_finished()
+                self._live.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire_finished(self):
+        # Fold shards of finished threads into one map so thread churn in
+        # the WSGI server does not grow the list
+        live = []
+        for thread, shard in self._live:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                _merge(self._retired, shard)
+        self._live = live
+
+    def collect(self):
+        with self._lock:
+            self._retire_finished()
+            total = dict(self._retired)
+            shards = [shard for _, shard in self._live]
+        for shard in shards:
+            _merge(total, shard.copy())
+        return total
+
+def _merge(target, source):
+    for key, value in source.items():
+        target[key] = target.get(key, 0) + value
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._shards = _Shards()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def collect(self):
+        return self._shards.collect()
+
+    def samples(self, values):
+        """Yield (suffix, label pairs, value) exposition samples"""
+        for labels, value in sorted(values.items()):
+            yield '', list(zip(self.labelnames, labels)), value
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        shard = self._shards.values()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        shard = self._shards.values()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        shard = self._shards.values()
+        key = self._key(labels)
+        # Count only the first bucket the value fits; buckets are made
+        # cumulative when rendered
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        bucket_key = key + (f'bucket:{index}',)
+        shard[bucket_key] = shard.get(bucket_key, 0) + 1
+        sum_key = key + ('sum',)
+        shard[sum_key] = shard.get(sum_key, 0) + value
+
+    def samples(self, values):
+        series = {}
+        for key, value in values.items():
+            series.setdefault(key[:-1], {})[key[-1]] = value
+        for labels, parts in sorted(series.items()):
+            pairs = list(zip(self.labelnames, labels))
+            cumulative = 0
+            for i, bound in enumerate(self.buckets + (float('inf'),)):
+                cumulative += parts.get(f'bucket:{i}', 0)
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                yield '_bucket', pairs + [('le', le)], cumulative
+            yield '_sum', pairs, parts.get('sum', 0)
+            yield '_count', pairs, cumulative
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self.multiproc_dir = None
+        self._last_flush = 0
+        self._flush_lock = threading.Lock()
+        self._snapshot_pid = None
+        self._snapshot_id = None
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def _snapshot_filename(self):
+        pid = os.getpid()
+        if self._snapshot_pid != pid:
+            # New id per process, so neither a forked child nor a later
+            # process with a reused PID overwrites an existing snapshot
+            self._snapshot_pid, self._snapshot_id = pid, uuid.uuid4().hex
+        return f'metrics-{pid}-{self._snapshot_id}.json'
+
+    def _read_snapshot(self, filename):
+        try:
+            with open(os.path.join(self.multiproc_dir, filename)) as f:
+                return {name: {tuple(key): value for key, value in values} for name, values in json.load(f).items()}
+        except (OSError, ValueError):
+            return None
+
+    def _write_snapshot(self, filename, totals):
+        path = os.path.join(self.multiproc_dir, filename)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({name: [[list(key), value] for key, value in values.items()]
+                       for name, values in totals.items()}, f)
+        os.replace(tmp_path, path)
+
+    def flush(self, force=False):
+        """Write this process's totals for other workers to merge"""
+        if not self.multiproc_dir:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < FLUSH_INTERVAL:
+            return
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_flush = now
+            self._write_snapshot(self._snapshot_filename(),
+                                 {metric.name: metric.collect() for metric in self._metrics})
+        finally:
+            self._flush_lock.release()
+
+    def _archive(self, filenames, gauges):
+        """Fold exited processes' snapshots into the archive and delete them"""
+        import fcntl
+
+        # Every worker may scrape at once; the lock keeps a snapshot from
+        # being added to the archive twice
+        with open(os.path.join(self.multiproc_dir, ARCHIVE_LOCK_FILENAME), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            archive = self._read_snapshot(ARCHIVE_FILENAME) or {}
+            archived = []
+            for filename in filenames:
+                snapshot = self._read_snapshot(filename)
+                if snapshot is None:
+                    # Already archived by another worker
+                    continue
+                for name, values in snapshot.items():
+                    if name not in gauges:
+                        _merge(archive.setdefault(name, {}), values)
+                archived.append(filename)
+            if archived:
+                self._write_snapshot(ARCHIVE_FILENAME, archive)
+                for filename in archived:
+                    os.remove(os.path.join(self.multiproc_dir, filename))
+
+    def _collect_all(self):
+        if not self.multiproc_dir:
+            return {metric.name: metric.collect() for metric in self._metrics}
+
+        self.flush(force=True)
+        own = self._snapshot_filename()
+        live, dead = [own], []
+        for filename in os.listdir(self.multiproc_dir):
+            if filename == own or not (filename.startswith('metrics-') and filename.endswith('.json')):
+                continue
+            pid = int(filename[len('metrics-'):-len('.json')].split('-')[0])
+            # Another file under this process's own PID was left by an
+            # earlier process that had the same PID
+            if pid != os.getpid() and _pid_alive(pid):
+                live.append(filename)
+            else:
+                dead.append(filename)
+
+        totals = {metric.name: {} for metric in self._metrics}
+        gauges = {metric.name for metric in self._metrics if metric.kind == 'gauge'}
+        if dead:
+            self._archive(dead, gauges)
+        for filename in live + [ARCHIVE_FILENAME]:
+            snapshot = self._read_snapshot(filename) or {}
+            for name, values in snapshot.items():
+                if name in totals:
+                    _merge(totals[name], values)
+        return totals
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        collected = self._collect_all()
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for suffix, pairs, value in metric.samples(collected[metric.name]):
+                labels = ','.join(f'{name}="{_escape(value_)}"' for name, value_ in pairs)
+                labels = f'{{{labels}}}' if labels else ''
+                lines.append(f'{metric.name}{suffix}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'Request latency by route', ('method', 'endpoint')
+)
+REQUESTS = registry.counter(
+    'http_requests_total', 'Requests served by route and status', ('method', 'endpoint', 'status')
+)
+REQUESTS_IN_FLIGHT = registry.gauge('http_requests_in_flight', 'Requests currently being served')
+DB_POOL_CHECKOUT_WAIT = registry.histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled database connection',
+    buckets=POOL_WAIT_BUCKETS
+)
+DONATIONS = registry.counter('bloodbridge_donations_total', 'Donations scheduled')
+BLOOD_REQUESTS = registry.counter('bloodbridge_blood_requests_total', 'Blood requests created', ('urgency',))
+VERIFICATIONS = registry.counter(
+    'bloodbridge_verifications_total', 'Donor verifications submitted or reviewed', ('status',)
+)
+EMAILS = registry.counter('bloodbridge_emails_total', 'Email delivery attempts by outcome', ('status',))
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+def init_metrics(app):
+    """
+    Record request metrics for the app and serve them at /metrics.
+
+    Config:
+        METRICS_MULTIPROC_DIR: Shared directory for merging worker processes
+        METRICS_TOKEN: Bearer token scrapers must send. Logged-in admins can
+            always view /metrics; with no token set, it answers 404 to
+            everyone else
+    """
+    registry.multiproc_dir = app.config.get('METRICS_MULTIPROC_DIR') or os.environ.get('METRICS_MULTIPROC_DIR')
+    if registry.multiproc_dir:
+        os.makedirs(registry.multiproc_dir, exist_ok=True)
+        atexit.register(registry.flush, force=True)
+
+    @app.before_request
+    def _start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+
+    @app.after_request
+    def _record_request_metrics(response):
+        started = g.get('metrics_started')
+        if started is not None and request.endpoint != 'static':
+            endpoint = request.endpoint or 'unmatched'
+            REQUEST_LATENCY.observe(time.perf_counter() - started, method=request.method, endpoint=endpoint)
+            REQUESTS.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+        return response
+
+    @app.teardown_request
+    def _finish_request_metrics(exc):
+        if g.pop('metrics_started', None) is not None:
+            REQUESTS_IN_FLIGHT.dec()
+        registry.flush()
+
+    @app.route('/metrics')
+    def metrics():
+        from flask_login import current_user
+
+        # Traffic and verification counts are not public: scrapers need the
+        # token, and without one configured only admins see the page
+        token = app.config.get('METRICS_TOKEN') or os.environ.get('METRICS_TOKEN')
+        expected = f'Bearer {token}'.encode()
+        if not (token and hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected)):
+            if not (current_user.is_authenticated and current_user.role == 'admin'):
+                abort(401 if token else 404)
+        return Response(registry.render(), content_type=CONTENT_TYPE)
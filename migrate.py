@@ -1,45 +1,78 @@
 """
-Database Reset Script for the BloodBridge System
+Database Migration Script for the BloodBridge System
 
-WARNING: This script will delete ALL existing data in the database
-and recreate the tables from scratch. Only use this if you're setting up
-a new system or don't mind losing your existing data.
+    python migrate.py upgrade     Apply pending migrations (the default)
+    python migrate.py status      List migrations and whether they are applied
+    python migrate.py reset       Drop everything and rebuild (asks first)
+
+Upgrades are incremental and keep existing data; see migrations/ for how
+scripts are written. WARNING: reset deletes ALL existing data. Only use it
+when setting up a new system.
 """
 
 import sys
 import logging
 import os
-from app import app, db
+from extensions import db
+from factory import UPLOAD_SUBFOLDERS, create_app
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Only config and extensions are needed here, not the web routes
+app = create_app()
+
 def reset_database():
-    """Drop all tables and recreate them"""
+    """Drop all tables and rebuild them through the migrations"""
+    import migrations
+
     with app.app_context():
         try:
             logger.info("Dropping all existing tables...")
             db.drop_all()
+            migrations.VERSION_TABLE.drop(db.engine, checkfirst=True)
             logger.info("All tables dropped successfully.")
-            
+
             logger.info("Creating tables with new schema...")
-            db.create_all()
+            migrations.upgrade(db.engine)
             logger.info("All tables created successfully.")
-            
+
             return True
         except Exception as e:
             logger.error(f"Error resetting database: {str(e)}")
             return False
 
+def upgrade_database():
+    """Apply pending migrations"""
+    import migrations
+
+    with app.app_context():
+        try:
+            applied = migrations.upgrade(db.engine)
+            if applied:
+                logger.info(f"Applied migrations: {', '.join(applied)}")
+            else:
+                logger.info("Database is up to date.")
+            return True
+        except Exception as e:
+            logger.error(f"Error applying migrations: {str(e)}")
+            return False
+
+def show_status():
+    """Print every migration and whether it has been applied"""
+    import migrations
+
+    with app.app_context():
+        for version, name, description, applied in migrations.status(db.engine):
+            print(f"{'[x]' if applied else '[ ]'} {version}_{name}  {description}")
+    return True
+
 def create_upload_directories():
     """Create directories for uploaded verification documents"""
-    upload_folder = os.path.join(app.root_path, 'static/uploads')
-    subdirs = ['id_documents', 'medical_certificates', 'address_proofs']
-    
-    for subdir in subdirs:
-        directory = os.path.join(upload_folder, subdir)
+    for subdir in UPLOAD_SUBFOLDERS:
+        directory = os.path.join(app.config['UPLOAD_FOLDER'], subdir)
         try:
             if not os.path.exists(directory):
                 os.makedirs(directory)
@@ -88,6 +121,19 @@ def setup_admin_account():
             return False
 
 if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'upgrade'
+
+    if command == 'status':
+        sys.exit(0 if show_status() else 1)
+
+    # backfill-documents and search-indexes are now migrations 0004 and 0005
+    if command in ('upgrade', 'backfill-documents', 'search-indexes'):
+        sys.exit(0 if upgrade_database() else 1)
+
+    if command != 'reset':
+        print(f"Unknown command '{command}'. Use upgrade, status or reset.")
+        sys.exit(2)
+
     print("BloodBridge Database Reset Tool")
     print("===============================")
     print("⚠️  WARNING: This will DELETE ALL DATA in your database and recreate the tables!")
@@ -95,7 +141,7 @@ if __name__ == "__main__":
     print()
     print("This script will:")
     print("1. Drop all existing tables")
-    print("2. Create new tables with the donor verification schema")
+    print("2. Recreate them by applying every migration")
     print("3. Set up upload directories")
     print("4. Create an admin account (admin@bloodbank.com / adminpass123)")
     print()
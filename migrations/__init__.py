@@ -0,0 +1,145 @@
+"""
+Versioned schema migrations.
+
+Each script in migrations/versions is named NNNN_description.py and defines
+upgrade(connection). Applied versions are recorded in the schema_migrations
+table, so `python migrate.py upgrade` only runs what a database is missing
+and never touches existing data otherwise.
+
+A script runs in one transaction together with its version row, unless it
+sets TRANSACTIONAL = False. Non-transactional scripts get an autocommit
+connection, which online index builds (CREATE INDEX CONCURRENTLY) and
+batched backfills (see migrations.ops) need. They must be safe to re-run,
+since a failure part way through leaves their version unrecorded.
+
+0001_baseline creates any missing table from the current models, so a fresh
+database gets the latest tables straight away. Later scripts must therefore
+tolerate their change already being present; the helpers in migrations.ops
+all do.
+"""
+
+import importlib
+import logging
+import pkgutil
+import re
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, text
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = Table(
+    'schema_migrations', MetaData(),
+    Column('version', String(16), primary_key=True),
+    Column('description', String(200)),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+# Arbitrary key for pg_advisory_lock, so concurrent deploys run migrations one at a time
+LOCK_KEY = 4839201
+
+_SCRIPT_RE = re.compile(r'^(\d{4})_(\w+)$')
+
+class Migration:
+    """A migration script found in migrations/versions"""
+
+    __slots__ = ('version', 'name', 'description', 'transactional', 'upgrade')
+
+    def __init__(self, version, name, module):
+        self.version = version
+        self.name = name
+        self.description = (module.__doc__ or name.replace('_', ' ')).strip().splitlines()[0]
+        self.transactional = getattr(module, 'TRANSACTIONAL', True)
+        self.upgrade = module.upgrade
+
+def discover():
+    """Load every migration script, ordered by version"""
+    from migrations import versions
+
+    migrations = []
+    for info in pkgutil.iter_modules(versions.__path__):
+        match = _SCRIPT_RE.match(info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f'{versions.__name__}.{info.name}')
+        migrations.append(Migration(match.group(1), match.group(2), module))
+    migrations.sort(key=lambda migration: migration.version)
+
+    versions_seen = [migration.version for migration in migrations]
+    if len(set(versions_seen)) != len(versions_seen):
+        raise RuntimeError(f"Duplicate migration versions in {versions.__path__[0]}")
+    return migrations
+
+def applied_versions(engine):
+    """Versions recorded in schema_migrations, creating the table if needed"""
+    VERSION_TABLE.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        return {row.version for row in connection.execute(VERSION_TABLE.select())}
+
+def pending(engine):
+    """Migrations not yet applied to the database"""
+    applied = applied_versions(engine)
+    return [migration for migration in discover() if migration.version not in applied]
+
+@contextmanager
+def migration_lock(engine):
+    """Hold a database-wide lock while migrating (PostgreSQL only)"""
+    if engine.dialect.name != 'postgresql':
+        yield
+        return
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.execute(text('SELECT pg_advisory_lock(:key)'), {'key': LOCK_KEY})
+        try:
+            yield
+        finally:
+            connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': LOCK_KEY})
+
+def _record(connection, migration):
+    connection.execute(VERSION_TABLE.insert().values(
+        version=migration.version,
+        description=migration.description[:200],
+        applied_at=datetime.utcnow()
+    ))
+
+def apply(engine, migration):
+    """Run one migration and record its version"""
+    if migration.transactional:
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            _record(connection, migration)
+        return
+
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        migration.upgrade(connection)
+        _record(connection, migration)
+
+def upgrade(engine, target=None):
+    """
+    Apply pending migrations in order.
+
+    Args:
+        engine: SQLAlchemy engine of the database to migrate
+        target: Last version to apply (default: all)
+
+    Returns:
+        list: Versions applied
+    """
+    applied = []
+    with migration_lock(engine):
+        # Re-read under the lock: another deploy may have just migrated
+        for migration in pending(engine):
+            if target is not None and migration.version > target:
+                break
+            logger.info(f"Applying migration {migration.version}_{migration.name}: {migration.description}")
+            apply(engine, migration)
+            applied.append(migration.version)
+    return applied
+
+def status(engine):
+    """(version, name, description, applied) for every known migration"""
+    applied = applied_versions(engine)
+    return [
+        (migration.version, migration.name, migration.description, migration.version in applied)
+        for migration in discover()
+    ]
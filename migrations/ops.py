@@ -0,0 +1,192 @@
+"""
+Building blocks for migration scripts.
+
+Every operation is idempotent, so a script can be re-run after a partial
+failure or against a database created from the current models.
+create_index, set_not_null and backfill need a non-transactional script
+(TRANSACTIONAL = False): on PostgreSQL indexes are built with
+CREATE INDEX CONCURRENTLY, which cannot run inside a transaction, and
+backfills commit every batch so they never hold locks on a whole table.
+"""
+
+import logging
+import time
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+# Backfill tuning: batch size adapts so each batch takes about
+# BACKFILL_TARGET_SECONDS, and the backfill pauses between batches so it
+# uses at most BACKFILL_DUTY_CYCLE of wall time.
+BACKFILL_BATCH_SIZE = 1000
+BACKFILL_MIN_BATCH_SIZE = 100
+BACKFILL_MAX_BATCH_SIZE = 50000
+BACKFILL_TARGET_SECONDS = 0.2
+BACKFILL_DUTY_CYCLE = 0.5
+# Wait for streaming replicas to catch up when they fall further behind
+MAX_REPLICA_LAG_SECONDS = 5.0
+
+def _quote(connection, name):
+    return connection.dialect.identifier_preparer.quote(name)
+
+def _require_autocommit(connection, operation):
+    if connection.get_execution_options().get('isolation_level') != 'AUTOCOMMIT':
+        raise RuntimeError(f"{operation} needs a migration with TRANSACTIONAL = False")
+
+def is_postgres(connection):
+    return connection.dialect.name == 'postgresql'
+
+def has_column(connection, table, column):
+    return any(info['name'] == column for info in inspect(connection).get_columns(table))
+
+def add_column(connection, table, column, ddl_type):
+    """
+    Add a column if it is missing.
+
+    Keep new columns nullable (or with a constant default) so PostgreSQL adds
+    them without rewriting the table; fill them with backfill().
+    """
+    if has_column(connection, table, column):
+        return False
+    connection.execute(text(f"ALTER TABLE {_quote(connection, table)} ADD COLUMN {_quote(connection, column)} {ddl_type}"))
+    return True
+
+def set_not_null(connection, table, column):
+    """
+    Make a column NOT NULL once no row holds NULL (PostgreSQL only).
+
+    A plain SET NOT NULL scans the table under an exclusive lock. Instead a
+    NOT VALID check constraint is added and validated, which only blocks
+    schema changes, and PostgreSQL 12+ then sets NOT NULL without a scan.
+    SQLite cannot change a column's nullability in place, so there the
+    model's default is what keeps new rows filled.
+
+    Returns:
+        bool: Whether the column was changed
+    """
+    _require_autocommit(connection, 'set_not_null')
+    if not is_postgres(connection):
+        return False
+    if not any(info['name'] == column and info['nullable'] for info in inspect(connection).get_columns(table)):
+        return False
+    table_sql, column_sql = _quote(connection, table), _quote(connection, column)
+    check = _quote(connection, f'{table}_{column}_not_null')
+    connection.execute(text(f"ALTER TABLE {table_sql} DROP CONSTRAINT IF EXISTS {check}"))
+    connection.execute(text(f"ALTER TABLE {table_sql} ADD CONSTRAINT {check} CHECK ({column_sql} IS NOT NULL) NOT VALID"))
+    connection.execute(text(f"ALTER TABLE {table_sql} VALIDATE CONSTRAINT {check}"))
+    connection.execute(text(f"ALTER TABLE {table_sql} ALTER COLUMN {column_sql} SET NOT NULL"))
+    connection.execute(text(f"ALTER TABLE {table_sql} DROP CONSTRAINT {check}"))
+    return True
+
+def _invalid_index(connection, name):
+    # A failed or cancelled concurrent build leaves an INVALID index behind
+    return connection.execute(text(
+        "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+        "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+    ), {'name': name}).first() is not None
+
+def create_index(connection, name, table, expression, unique=False, using=None, where=None):
+    """
+    Create an index without blocking writes to the table.
+
+    Args:
+        connection: Autocommit connection passed to upgrade()
+        name: Index name
+        table: Table name
+        expression: Column list or expression, e.g. "donor_id, donation_date"
+        unique: Create a unique index
+        using: Index method, e.g. 'gin' (PostgreSQL only)
+        where: Predicate for a partial index
+    """
+    _require_autocommit(connection, 'create_index')
+    unique_sql = 'UNIQUE ' if unique else ''
+    where_sql = f' WHERE {where}' if where else ''
+    table_sql = _quote(connection, table)
+
+    if not is_postgres(connection):
+        connection.execute(text(
+            f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table_sql} ({expression}){where_sql}"
+        ))
+        return
+
+    if _invalid_index(connection, name):
+        logger.info(f"Dropping invalid index {name} left by an earlier build")
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    using_sql = f' USING {using}' if using else ''
+    started = time.perf_counter()
+    connection.execute(text(
+        f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} "
+        f"ON {table_sql}{using_sql} ({expression}){where_sql}"
+    ))
+    logger.info(f"Index {name} ready in {time.perf_counter() - started:.1f}s")
+
+def drop_index(connection, name):
+    """Drop an index without blocking writes to its table"""
+    _require_autocommit(connection, 'drop_index')
+    concurrently = 'CONCURRENTLY ' if is_postgres(connection) else ''
+    connection.execute(text(f"DROP INDEX {concurrently}IF EXISTS {name}"))
+
+def replica_lag(connection):
+    """Seconds the slowest streaming replica is behind, or 0"""
+    if not is_postgres(connection):
+        return 0.0
+    lag = connection.execute(text(
+        "SELECT COALESCE(MAX(EXTRACT(EPOCH FROM replay_lag)), 0) FROM pg_stat_replication"
+    )).scalar()
+    return float(lag or 0)
+
+def _wait_for_replicas(connection, max_lag):
+    while max_lag is not None and (lag := replica_lag(connection)) > max_lag:
+        logger.info(f"Replica lag {lag:.1f}s, pausing backfill")
+        time.sleep(min(lag, 10))
+
+def backfill(connection, table, apply_batch, id_column='id', batch_size=BACKFILL_BATCH_SIZE,
+             target_seconds=BACKFILL_TARGET_SECONDS, duty_cycle=BACKFILL_DUTY_CYCLE,
+             max_replica_lag=MAX_REPLICA_LAG_SECONDS):
+    """
+    Run a data change over a table in small, throttled id-range batches.
+
+    Each batch commits on its own. Batch size adapts so a batch takes about
+    target_seconds, the backfill sleeps between batches so it runs at most
+    duty_cycle of the time, and it pauses while replicas lag behind.
+
+    Args:
+        connection: Autocommit connection passed to upgrade()
+        table: Table to walk, by primary key range
+        apply_batch: Callable (connection, first_id, last_id) that changes the
+            rows with ids in that inclusive range and returns a row count
+        id_column: Integer key to walk
+        batch_size: Initial ids per batch
+
+    Returns:
+        int: Total rows reported by apply_batch
+    """
+    _require_autocommit(connection, 'backfill')
+    id_sql = _quote(connection, id_column)
+    low, high = connection.execute(text(
+        f"SELECT MIN({id_sql}), MAX({id_sql}) FROM {_quote(connection, table)}"
+    )).first()
+    if low is None:
+        return 0
+
+    total = 0
+    size = batch_size
+    first_id = low
+    while first_id <= high:
+        last_id = first_id + size - 1
+        started = time.perf_counter()
+        total += apply_batch(connection, first_id, last_id) or 0
+        elapsed = time.perf_counter() - started
+
+        if elapsed > target_seconds * 2:
+            size = max(BACKFILL_MIN_BATCH_SIZE, size // 2)
+        elif elapsed < target_seconds / 2:
+            size = min(BACKFILL_MAX_BATCH_SIZE, size * 2)
+        logger.info(f"Backfill {table}: ids up to {min(last_id, high)} of {high}, {total} rows")
+
+        first_id = last_id + 1
+        if first_id <= high:
+            time.sleep(elapsed * (1 - duty_cycle) / duty_cycle)
+            _wait_for_replicas(connection, max_replica_lag)
+    return total
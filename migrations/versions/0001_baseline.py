@@ -0,0 +1,8 @@
+"""Create any missing tables from the current models"""
+
+def upgrade(connection):
+    import models  # noqa: F401 - registers the tables
+    from extensions import db
+
+    # Existing tables are left alone; later migrations bring them up to date
+    db.metadata.create_all(connection, checkfirst=True)
@@ -0,0 +1,6 @@
+"""Add blood_request.fulfilled_center for stock-aware fulfilment"""
+
+from migrations.ops import add_column
+
+def upgrade(connection):
+    add_column(connection, 'blood_request', 'fulfilled_center', 'VARCHAR(200)')
@@ -0,0 +1,16 @@
+"""Build the donor matching and listing indexes on existing tables"""
+
+from migrations.ops import create_index
+
+TRANSACTIONAL = False
+
+INDEXES = (
+    ('ix_user_donor_match', 'user', 'role, blood_type, is_available, is_verified, next_eligible_date'),
+    ('ix_blood_request_type_status_created', 'blood_request', 'blood_type, status, created_at'),
+    ('ix_blood_request_requester_created', 'blood_request', 'requester_id, created_at'),
+    ('ix_donation_donor_date', 'donation', 'donor_id, donation_date'),
+)
+
+def upgrade(connection):
+    for name, table, columns in INDEXES:
+        create_index(connection, name, table, columns)
@@ -0,0 +1,16 @@
+"""Index documents of verifications submitted before verification_document existed"""
+
+from migrations.ops import backfill
+
+TRANSACTIONAL = False
+
+def _index_documents(connection, first_id, last_id):
+    from documents import backfill_statements
+
+    return sum(
+        connection.execute(statement).rowcount or 0
+        for statement in backfill_statements(first_id, last_id)
+    )
+
+def upgrade(connection):
+    backfill(connection, 'donor_verification', _index_documents)
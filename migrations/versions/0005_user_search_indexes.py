@@ -0,0 +1,18 @@
+"""Add the pg_trgm and tsvector indexes behind admin user search (PostgreSQL only)"""
+
+from sqlalchemy import text
+
+from migrations.ops import create_index, is_postgres
+
+TRANSACTIONAL = False
+
+# Must match user_search._search_text()
+SEARCH_TEXT = "coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || email"
+
+def upgrade(connection):
+    if not is_postgres(connection):
+        # Other databases fall back to LIKE in user_search
+        return
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    create_index(connection, 'ix_user_search_trgm', 'user', f"(lower({SEARCH_TEXT})) gin_trgm_ops", using='gin')
+    create_index(connection, 'ix_user_search_tsv', 'user', f"to_tsvector('simple', {SEARCH_TEXT})", using='gin')
@@ -0,0 +1,12 @@
+"""Seed blood stock levels from completed donations and fulfilled requests"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+def upgrade(connection):
+    from inventory import rebuild_stock
+
+    # Runs in the migration's transaction, so the table is never seen half-filled
+    rows = rebuild_stock(connection)
+    logger.info(f"Seeded {rows} blood stock row(s) from donation and request history")
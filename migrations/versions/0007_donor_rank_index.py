@@ -0,0 +1,17 @@
+"""Replace the donor matching index with one that stores candidates in rank order"""
+
+from migrations.ops import create_index, drop_index, is_postgres
+
+TRANSACTIONAL = False
+
+EQUALITY_COLUMNS = 'role, blood_type, is_available, is_verified, verification_status'
+
+def upgrade(connection):
+    # matching.RANK_ORDER puts NULL dates first: PostgreSQL indexes sort them
+    # last unless told otherwise, SQLite sorts them first and rejects NULLS FIRST
+    nulls_first = ' NULLS FIRST' if is_postgres(connection) else ''
+    create_index(
+        connection, 'ix_user_donor_rank', 'user',
+        f'{EQUALITY_COLUMNS}, next_eligible_date{nulls_first}, last_donation_date{nulls_first}, id'
+    )
+    drop_index(connection, 'ix_user_donor_match')
@@ -0,0 +1,9 @@
+"""Index lower(email) for case-insensitive login and import lookups"""
+
+from migrations.ops import create_index
+
+TRANSACTIONAL = False
+
+def upgrade(connection):
+    # Not unique: older accounts may differ only in case. Must match User.email_in()
+    create_index(connection, 'ix_user_email_lower', 'user', '(lower(email))')
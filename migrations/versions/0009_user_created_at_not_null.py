@@ -0,0 +1,21 @@
+"""Fill missing user.created_at and make it NOT NULL for keyset paging"""
+
+from sqlalchemy import text
+
+from migrations.ops import backfill, set_not_null
+
+TRANSACTIONAL = False
+
+def upgrade(connection):
+    # Accounts without a creation time predate every recorded one, so they
+    # take the earliest known time and page after all other users
+    earliest = connection.execute(text('SELECT MIN(created_at) FROM "user"')).scalar()
+
+    def fill(connection, first_id, last_id):
+        return connection.execute(text(
+            'UPDATE "user" SET created_at = COALESCE(:earliest, CURRENT_TIMESTAMP) '
+            'WHERE id BETWEEN :first_id AND :last_id AND created_at IS NULL'
+        ), {'earliest': earliest, 'first_id': first_id, 'last_id': last_id}).rowcount
+
+    backfill(connection, 'user', fill)
+    set_not_null(connection, 'user', 'created_at')
@@ -0,0 +1 @@
+"""Migration scripts, applied in order of their NNNN prefix"""
@@ -1,11 +1,13 @@
 from extensions import db
 from flask_login import UserMixin
 from datetime import datetime, timedelta
-import pyotp
 import secrets
 import json
 
 class User(UserMixin, db.Model):
+    # The donor matching index (ix_user_donor_rank) is created by migration
+    # 0007, since its NULL ordering has to be spelled per database
+
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
     first_name = db.Column(db.String(64), nullable=False)
@@ -20,7 +22,7 @@ class User(UserMixin, db.Model):
     date_of_birth = db.Column(db.Date)
     medical_conditions = db.Column(db.Text)
     is_available = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     # 2FA fields
     totp_secret = db.Column(db.String(32))
     totp_enabled = db.Column(db.Boolean, default=False)
@@ -36,6 +38,8 @@ class User(UserMixin, db.Model):
     def get_totp_uri(self):
         """Generate the TOTP URI for QR code generation"""
         if self.totp_secret:
+            import pyotp
+
             return pyotp.totp.TOTP(self.totp_secret).provisioning_uri(
                 name=self.email,
                 issuer_name="Blood Donation System"
@@ -46,11 +50,15 @@ class User(UserMixin, db.Model):
         """Verify the TOTP token"""
         if not self.totp_secret:
             return False
+        import pyotp
+
         totp = pyotp.TOTP(self.totp_secret)
         return totp.verify(token)
 
     def generate_totp_secret(self):
         """Generate a new TOTP secret"""
+        import pyotp
+
         self.totp_secret = pyotp.random_base32()
         return self.totp_secret
         
@@ -67,6 +75,16 @@ class User(UserMixin, db.Model):
     def get_full_name(self):
         """Get user's full name"""
         return f"{self.first_name} {self.last_name}"
+
+    @staticmethod
+    def email_in(emails):
+        """
+        Case-insensitive filter on email addresses, served by ix_user_email_lower.
+
+        New addresses are stored normalized, but older accounts may keep the
+        case they registered with, so lookups compare lower(email).
+        """
+        return db.func.lower(User.email).in_([email.strip().lower() for email in emails])
     
     def generate_password_reset_token(self):
         """Generate a new password reset token for the user"""
@@ -89,6 +107,13 @@ class User(UserMixin, db.Model):
         return None
 
 class BloodRequest(db.Model):
+    __table_args__ = (
+        # Serves the donor view: compatible types, open status, newest first
+        db.Index('ix_blood_request_type_status_created', 'blood_type', 'status', 'created_at'),
+        # Serves the receiver dashboard and history, and lookups by requester
+        db.Index('ix_blood_request_requester_created', 'requester_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     requester_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     blood_type = db.Column(db.String(5), nullable=False)
@@ -100,10 +125,18 @@ class BloodRequest(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     required_by = db.Column(db.DateTime)
 
+    # Blood bank the units were issued from once the request is fulfilled
+    fulfilled_center = db.Column(db.String(200))
+
     # Relationships
     requester = db.relationship('User', backref='blood_requests')
 
 class Donation(db.Model):
+    __table_args__ = (
+        # Serves the donor dashboard and donation history
+        db.Index('ix_donation_donor_date', 'donor_id', 'donation_date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     donor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     blood_type = db.Column(db.String(5), nullable=False)
@@ -116,6 +149,18 @@ class Donation(db.Model):
     # Relationships
     donor = db.relationship('User', backref='donations')
 
+class BloodStock(db.Model):
+    """Units on hand per blood type and center, kept current by inventory.py"""
+    __table_args__ = (
+        db.UniqueConstraint('center', 'blood_type', name='uq_blood_stock_center_type'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    center = db.Column(db.String(200), nullable=False)
+    blood_type = db.Column(db.String(5), nullable=False)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
 class DonorVerification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     donor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -135,6 +180,23 @@ class DonorVerification(db.Model):
     donor = db.relationship('User', foreign_keys=[donor_id], backref='verifications')
     reviewer = db.relationship('User', foreign_keys=[reviewer_id])
 
+class VerificationDocument(db.Model):
+    """Index of uploaded documents, used to authorize document views"""
+    __table_args__ = (
+        # Stored files are named by content hash, so one file can back several
+        # verifications; lookups by (document_type, filename) use the prefix.
+        db.Index('uq_verification_document_type_filename', 'document_type', 'filename', 'verification_id', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    verification_id = db.Column(db.Integer, db.ForeignKey('donor_verification.id'), nullable=False, index=True)
+    donor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    document_type = db.Column(db.String(30), nullable=False)  # 'id_documents', 'medical_certificates', 'address_proofs'
+    filename = db.Column(db.String(200), nullable=False)
+
+    # Relationships
+    verification = db.relationship('DonorVerification', backref='documents')
+
 class PasswordReset(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -178,4 +240,37 @@ class AdminActionLog(db.Model):
     
     # Relationships
     admin = db.relationship('User', foreign_keys=[admin_id])
-    target_user = db.relationship('User', foreign_keys=[target_user_id])
\ No newline at end of file
+    target_user = db.relationship('User', foreign_keys=[target_user_id])
+
+class OutboundEmail(db.Model):
+    """Mail queued for delivery by the background worker in email_utils"""
+    __table_args__ = (
+        # Worker polls for due messages in this order
+        db.Index('ix_outbound_email_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    body_html = db.Column(db.Text, nullable=False)
+    body_text = db.Column(db.Text)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'sending', 'sent', 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+class DonorNotification(db.Model):
+    """Record of a donor being alerted about a blood request"""
+    __table_args__ = (
+        # One alert per donor per request
+        db.UniqueConstraint('donor_id', 'blood_request_id', name='uq_donor_notification_donor_request'),
+        # Per-donor cooldown lookups
+        db.Index('ix_donor_notification_donor_created', 'donor_id', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    donor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    blood_request_id = db.Column(db.Integer, db.ForeignKey('blood_request.id'), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,117 @@
+"""
+Urgent blood request notifications.
+
+When an urgent or emergency request is created, compatible eligible donors
+are streamed from the database in batches and an alert email is queued for
+each one from the precompiled 'urgent_request' email template. Donors are
+alerted at most once per request and at most once per
+NOTIFICATION_COOLDOWN across all requests.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from batching import iter_batches
+from extensions import db
+from matching import matching_donor_criteria
+from models import BloodRequest, DonorNotification, OutboundEmail, User
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_URGENCIES = {'urgent', 'emergency'}
+NOTIFICATION_COOLDOWN = timedelta(hours=24)
+FAN_OUT_BATCH_SIZE = 1000
+
+_fan_out_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='fan-out')
+
+def should_notify(blood_request):
+    return blood_request.urgency in NOTIFY_URGENCIES
+
+def _recently_notified(donor_ids, blood_request_id, cutoff):
+    """Donors in the batch already alerted for this request or within the cooldown"""
+    rows = db.session.query(DonorNotification.donor_id).filter(
+        DonorNotification.donor_id.in_(donor_ids),
+        db.or_(
+            DonorNotification.blood_request_id == blood_request_id,
+            DonorNotification.created_at > cutoff
+        )
+    )
+    return {donor_id for donor_id, in rows}
+
+def _queue_batch(blood_request, request_context, donors, now):
+    skip = _recently_notified([donor.id for donor in donors], blood_request.id, now - NOTIFICATION_COOLDOWN)
+    donors = [donor for donor in donors if donor.id not in skip]
+    if not donors:
+        return 0
+
+    from email_utils import email_templates
+
+    rendered = email_templates.render_batch(
+        'urgent_request', request_context, ({'first_name': donor.first_name} for donor in donors)
+    )
+    emails = []
+    notifications = []
+    for donor, (subject, body_html, body_text) in zip(donors, rendered):
+        emails.append({
+            'recipient': donor.email,
+            'subject': subject,
+            'body_html': body_html,
+            'body_text': body_text,
+            'status': 'queued',
+            'attempts': 0,
+            'next_attempt_at': now,
+            'created_at': now,
+        })
+        notifications.append({'donor_id': donor.id, 'blood_request_id': blood_request.id, 'created_at': now})
+
+    db.session.execute(db.insert(DonorNotification), notifications)
+    db.session.execute(db.insert(OutboundEmail), emails)
+    db.session.commit()
+    return len(donors)
+
+def fan_out_request(blood_request, requests_url, batch_size=FAN_OUT_BATCH_SIZE):
+    """
+    Queue alert emails for every compatible, eligible donor.
+
+    Donors are streamed with a server-side cursor where the database
+    supports one and processed in batches, each committed with bulk inserts.
+
+    Returns:
+        int: Number of donors notified
+    """
+    now = datetime.utcnow()
+    request_context = {
+        'urgency': blood_request.urgency,
+        'blood_type': blood_request.blood_type,
+        'units_needed': blood_request.units_needed,
+        'hospital': blood_request.hospital or 'A hospital near you',
+        'required_by': blood_request.required_by.strftime('%Y-%m-%d') if blood_request.required_by else None,
+        'requests_url': requests_url,
+    }
+
+    donors = db.select(User.id, User.email, User.first_name).where(
+        *matching_donor_criteria(blood_request, now)
+    )
+
+    notified = 0
+    for batch in iter_batches(donors, User.id, batch_size):
+        notified += _queue_batch(blood_request, request_context, batch, now)
+
+    logger.info(f"Notified {notified} donors about blood request {blood_request.id}")
+    return notified
+
+def _run_fan_out(app, blood_request_id, requests_url):
+    with app.app_context():
+        try:
+            blood_request = db.session.get(BloodRequest, blood_request_id)
+            if blood_request:
+                fan_out_request(blood_request, requests_url)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Fan-out for blood request {blood_request_id} failed: {str(e)}")
+
+def schedule_fan_out(app, blood_request, requests_url):
+    """Notify donors about an urgent request without blocking the response"""
+    if should_notify(blood_request):
+        _fan_out_executor.submit(_run_fan_out, app, blood_request.id, requests_url)
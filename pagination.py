@@ -0,0 +1,151 @@
+"""
+Keyset (seek) pagination helpers.
+
+Pages are ordered newest first by a (timestamp, id) pair and continue from
+the last row seen, so deep pages cost the same as the first one.
+keyset_page() takes and returns plain `before`/`before_id` arguments for
+JSON endpoints; cursor_paginate() wraps the same seek in an opaque cursor
+token for HTML listings and can add a cached or approximate total.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from flask import abort
+
+from cache import TTLCache
+from extensions import db
+
+COUNT_CACHE_TTL = 60  # seconds
+
+_count_cache = TTLCache(ttl=COUNT_CACHE_TTL, maxsize=1000)
+
+def parse_keyset_args(args):
+    """
+    Read the `before`/`before_id` cursor from request arguments.
+
+    Returns:
+        tuple: (before, before_id), both None on the first page
+    """
+    before = args.get('before')
+    before_id = args.get('before_id', type=int)
+    if not before or not before_id:
+        return None, None
+    try:
+        return datetime.fromisoformat(before), before_id
+    except ValueError:
+        abort(400)
+
+def keyset_page(query, date_column, id_column, per_page, before=None, before_id=None):
+    """
+    Fetch one page of a query ordered by (date_column, id_column) descending.
+
+    Returns:
+        tuple: (items, next_cursor) where next_cursor is a dict of request
+        arguments for the following page, or None on the last page
+    """
+    items, last = _seek(query, date_column, id_column, per_page, before, before_id)
+    if last is None:
+        return items, None
+    return items, {'before': last[0].isoformat(), 'before_id': last[1]}
+
+def _seek(query, date_column, id_column, per_page, before, before_id):
+    """Fetch a page and the (date, id) key of its last row if more follow"""
+    if before is not None and before_id is not None:
+        query = query.filter(db.or_(
+            date_column < before,
+            db.and_(date_column == before, id_column < before_id)
+        ))
+
+    items = query.order_by(date_column.desc(), id_column.desc()).limit(per_page + 1).all()
+    if len(items) <= per_page:
+        return items, None
+
+    items = items[:per_page]
+    last = items[-1]
+    return items, (getattr(last, date_column.key), getattr(last, id_column.key))
+
+def encode_cursor(position):
+    """Encode a (datetime, id) position as an opaque URL-safe token"""
+    payload = json.dumps([position[0].isoformat(), position[1]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(token):
+    """
+    Decode a token from encode_cursor().
+
+    Returns:
+        tuple: (datetime, id), or (None, None) for an empty token; aborts
+        with 400 if the token is malformed
+    """
+    if not token:
+        return None, None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        before, before_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(before), int(before_id)
+    except (ValueError, TypeError):
+        abort(400)
+
+class CursorPage:
+    """One page of a cursor-paginated listing"""
+
+    def __init__(self, items, next_cursor, total=None, approximate=False):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+        self.approximate = approximate
+
+def cached_count(query, key):
+    """Exact row count of a query, cached for COUNT_CACHE_TTL under key"""
+    return _count_cache.get_or_set(key, lambda: query.order_by(None).count())
+
+def approximate_count(model):
+    """
+    Estimate a table's row count from PostgreSQL planner statistics.
+
+    Returns:
+        int or None: The estimate, or None where it is not available
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return None
+    estimate = db.session.execute(
+        db.text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+        {'table': db.engine.dialect.identifier_preparer.quote(model.__tablename__)}
+    ).scalar()
+    # reltuples is -1 for tables that have never been analyzed
+    return estimate if estimate is not None and estimate >= 0 else None
+
+def cursor_paginate(query, date_column, id_column, per_page, cursor=None, count_key=None, approximate_model=None):
+    """
+    Fetch one page of a query by opaque cursor, newest first.
+
+    Args:
+        query: Filtered query to page through
+        date_column, id_column: Columns forming the (date, id) sort key
+        per_page: Page size
+        cursor: Token from a previous page's next_cursor, or None
+        count_key: If given, include an exact total cached under this key
+        approximate_model: If given, use the planner's estimate for this
+            (unfiltered) model's table where available, falling back to the
+            cached exact count
+
+    Returns:
+        CursorPage
+    """
+    before, before_id = decode_cursor(cursor)
+    items, last = _seek(query, date_column, id_column, per_page, before, before_id)
+    next_cursor = encode_cursor(last) if last is not None else None
+
+    total, approximate = None, False
+    if approximate_model is not None:
+        total = approximate_count(approximate_model)
+        approximate = total is not None
+    if total is None and count_key is not None:
+        total = cached_count(query, count_key)
+    return CursorPage(items, next_cursor, total, approximate)
+
+def invalidate_counts():
+    """Drop cached totals after writes that change listing sizes"""
+    _count_cache.clear()
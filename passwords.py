@@ -0,0 +1,131 @@
+"""
+Password hashing service.
+
+Hashing and verification run on a bounded process pool instead of the
+request thread, so a burst of logins queues for CPU rather than pinning
+every web worker. At most PASSWORD_POOL_MAX_PENDING jobs may be queued;
+beyond that callers wait up to PASSWORD_POOL_TIMEOUT seconds for a slot
+and then get PasswordHasherBusy, which the app turns into a 503.
+
+The algorithm and cost are a werkzeug method string (PASSWORD_HASH_METHOD,
+e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000"). Hashes made with other
+parameters still verify, and needs_rehash() tells login to upgrade them.
+"""
+
+import os
+import threading
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+DEFAULT_TIMEOUT = 5  # seconds to wait for a queue slot
+# Pool processes per web worker. Every gunicorn worker has its own pool, so
+# the machine runs web workers x this many hashing processes; keep that
+# product near the core count.
+DEFAULT_WORKERS = 2
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when the hashing queue is full"""
+
+class PasswordHasher:
+    def __init__(self, method=DEFAULT_METHOD, workers=None, max_pending=None, timeout=DEFAULT_TIMEOUT):
+        self.configure(method, workers, max_pending, timeout)
+
+    def configure(self, method=DEFAULT_METHOD, workers=None, max_pending=None, timeout=DEFAULT_TIMEOUT):
+        """
+        Set hashing parameters and pool size.
+
+        Args:
+            method: werkzeug hash method string
+            workers: Pool processes in this process; defaults to
+                DEFAULT_WORKERS, 0 hashes on the calling thread
+            max_pending: Jobs allowed in flight; defaults to 4 per worker
+            timeout: Seconds to wait for a queue slot before giving up
+        """
+        if getattr(self, '_executor', None) is not None:
+            self.shutdown()
+        self.method = method
+        self._hash_prefix = None
+        self.workers = DEFAULT_WORKERS if workers is None else workers
+        self.max_pending = max_pending or max(self.workers, 1) * 4
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Pools do not survive fork, so each web worker process gets its own
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._lock:
+                if self._executor is None or self._executor_pid != pid:
+                    import multiprocessing
+                    from concurrent.futures import ProcessPoolExecutor
+
+                    # Forking a threaded web worker can leave the child holding
+                    # locks owned by other threads; start from a clean process
+                    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context(method)
+                    )
+                    self._executor_pid = pid
+        return self._executor
+
+    def _run(self, func, *args):
+        if self.workers == 0:
+            return func(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordHasherBusy('Password hashing queue is full')
+        try:
+            future = self._get_executor().submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        """Hash a password with the configured method"""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        """Check a password against a stored hash of any supported method"""
+        if not pwhash:
+            return False
+        return self._run(check_password_hash, pwhash, password)
+
+    @property
+    def hash_prefix(self):
+        # werkzeug fills in default costs, so compare against the prefix it
+        # actually writes
+        if self._hash_prefix is None:
+            self._hash_prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return self._hash_prefix
+
+    def needs_rehash(self, pwhash):
+        """Whether a stored hash was made with different parameters"""
+        return bool(pwhash) and pwhash.split('$', 1)[0] != self.hash_prefix
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_hasher = PasswordHasher(workers=0)
+
+def init_password_hashing(app):
+    """
+    Configure the shared hasher from the app config.
+
+    Config:
+        PASSWORD_HASH_METHOD, PASSWORD_POOL_WORKERS,
+        PASSWORD_POOL_MAX_PENDING, PASSWORD_POOL_TIMEOUT
+    """
+    workers = app.config.get('PASSWORD_POOL_WORKERS', os.environ.get('PASSWORD_POOL_WORKERS'))
+    password_hasher.configure(
+        method=app.config.get('PASSWORD_HASH_METHOD', os.environ.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)),
+        workers=int(workers) if workers is not None else None,
+        max_pending=app.config.get('PASSWORD_POOL_MAX_PENDING'),
+        timeout=app.config.get('PASSWORD_POOL_TIMEOUT', DEFAULT_TIMEOUT),
+    )
@@ -0,0 +1,187 @@
+"""
+Per-request SQL instrumentation.
+
+SQLAlchemy cursor events time every statement run while a request is being
+served. On the way out each request gets a structured log line, optional
+debug headers with its query count and database time, and a sample in the
+in-process registry behind the admin /admin/perf page. Statements slower
+than PERF_SLOW_QUERY_SECONDS are logged with the shape of their parameters
+(types only, never values).
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_SECONDS = 0.1
+SAMPLES_PER_ENDPOINT = 1000
+MAX_SLOW_QUERIES = 100
+
+_local = threading.local()
+
+class RequestProfile:
+    """Query count, database time and slow statements for one request"""
+    __slots__ = ('query_count', 'db_time', 'slow_queries', 'slow_threshold')
+
+    def __init__(self, slow_threshold):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.slow_queries = []
+        self.slow_threshold = slow_threshold
+
+def parameters_shape(parameters):
+    """Describe bound parameters by type so they can be logged safely"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return {'executemany': len(parameters), 'row': parameters_shape(parameters[0])}
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    index = max(int(round(pct / 100 * len(values))) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+class PerfRegistry:
+    """Recent request samples per endpoint, kept in memory for /admin/perf"""
+
+    def __init__(self, samples_per_endpoint=SAMPLES_PER_ENDPOINT, max_slow_queries=MAX_SLOW_QUERIES):
+        self.samples_per_endpoint = samples_per_endpoint
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._totals = {}
+        self._slow_queries = deque(maxlen=max_slow_queries)
+
+    def record(self, endpoint, duration, profile):
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=self.samples_per_endpoint)
+            samples.append((duration, profile.db_time, profile.query_count))
+            self._totals[endpoint] = self._totals.get(endpoint, 0) + 1
+            for slow in profile.slow_queries:
+                self._slow_queries.appendleft(dict(slow, endpoint=endpoint))
+
+    def summary(self):
+        """
+        Summarise the recorded samples per endpoint.
+
+        Returns:
+            list: One dict per endpoint with request count, latency and
+            database time percentiles (ms) and query counts, slowest p95 first
+        """
+        with self._lock:
+            snapshot = {endpoint: list(samples) for endpoint, samples in self._samples.items()}
+            totals = dict(self._totals)
+
+        rows = []
+        for endpoint, samples in snapshot.items():
+            durations = sorted(sample[0] * 1000 for sample in samples)
+            db_times = sorted(sample[1] * 1000 for sample in samples)
+            query_counts = sorted(sample[2] for sample in samples)
+            rows.append({
+                'endpoint': endpoint,
+                'requests': totals[endpoint],
+                'p50_ms': percentile(durations, 50),
+                'p95_ms': percentile(durations, 95),
+                'p99_ms': percentile(durations, 99),
+                'db_p95_ms': percentile(db_times, 95),
+                'queries_p50': percentile(query_counts, 50),
+                'queries_max': query_counts[-1],
+            })
+        rows.sort(key=lambda row: row['p95_ms'], reverse=True)
+        return rows
+
+    def slow_queries(self):
+        with self._lock:
+            return list(self._slow_queries)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._slow_queries.clear()
+
+perf_registry = PerfRegistry()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, 'profile', None) is not None:
+        conn.info.setdefault('perf_statement_start', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _finish_statement(conn, cursor, statement, parameters, context, executemany):
+    profile = getattr(_local, 'profile', None)
+    starts = conn.info.get('perf_statement_start')
+    if profile is None or not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    profile.query_count += 1
+    profile.db_time += elapsed
+    if elapsed >= profile.slow_threshold:
+        profile.slow_queries.append({
+            'statement': statement,
+            'parameters': parameters_shape(parameters),
+            'duration_ms': round(elapsed * 1000, 2),
+        })
+
+def init_perf(app):
+    """
+    Instrument every request served by the app.
+
+    Config:
+        PERF_SLOW_QUERY_SECONDS: Threshold for the slow statement log
+        PERF_DEBUG_HEADERS: Add X-DB-Query-Count/X-DB-Time-Ms headers
+            (defaults to app.debug)
+    """
+    app.config.setdefault('PERF_SLOW_QUERY_SECONDS', SLOW_QUERY_SECONDS)
+    app.config.setdefault('PERF_DEBUG_HEADERS', app.debug)
+
+    @app.before_request
+    def _start_profile():
+        _local.profile = RequestProfile(app.config['PERF_SLOW_QUERY_SECONDS'])
+        g.perf_started = time.perf_counter()
+
+    @app.after_request
+    def _finish_profile(response):
+        profile = getattr(_local, 'profile', None)
+        if profile is None or request.endpoint == 'static':
+            return response
+
+        duration = time.perf_counter() - g.perf_started
+        endpoint = request.endpoint or 'unmatched'
+        perf_registry.record(endpoint, duration, profile)
+
+        if app.config['PERF_DEBUG_HEADERS']:
+            response.headers['X-DB-Query-Count'] = str(profile.query_count)
+            response.headers['X-DB-Time-Ms'] = f"{profile.db_time * 1000:.2f}"
+
+        logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'endpoint': endpoint,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'db_queries': profile.query_count,
+            'db_time_ms': round(profile.db_time * 1000, 2),
+        }))
+        for slow in profile.slow_queries:
+            logger.warning(json.dumps(dict(slow, event='slow_query', endpoint=endpoint)))
+        return response
+
+    @app.teardown_request
+    def _drop_profile(exc):
+        _local.profile = None
@@ -0,0 +1,98 @@
+"""
+Background preview generation for uploaded verification documents.
+
+When a document is saved, a compressed JPEG preview is rendered on a small
+thread pool: a thumbnail for images, the first page for PDFs. Previews are
+stored next to the originals under previews/<document_type>/ and share the
+original's content-hash stem, so each distinct file is rendered once.
+"""
+
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_SIZE = (800, 800)
+PREVIEW_QUALITY = 70
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+
+_preview_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='preview')
+
+def preview_subfolder(document_type):
+    return f"previews/{document_type}"
+
+def preview_filename(filename):
+    return f"{os.path.splitext(filename)[0]}.jpg"
+
+def _render_image(source):
+    from PIL import Image
+
+    with Image.open(source) as image:
+        image.draft('RGB', PREVIEW_SIZE)  # Lets JPEG decoding downscale cheaply
+        image.thumbnail(PREVIEW_SIZE)
+        return image.convert('RGB')
+
+def _render_pdf_first_page(source):
+    """Render page one of a PDF, or return None when PyMuPDF is unavailable"""
+    try:
+        import fitz  # PyMuPDF, the optional "previews" extra
+    except ImportError:
+        # Reported once at startup by create_app
+        return None
+
+    from PIL import Image
+
+    with fitz.open(stream=source.read(), filetype='pdf') as document:
+        if document.page_count == 0:
+            return None
+        pixmap = document.load_page(0).get_pixmap()
+        image = Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+        image.thumbnail(PREVIEW_SIZE)
+        return image
+
+def generate_preview(storage, document_type, filename):
+    """
+    Render and store the preview for one document.
+
+    Returns:
+        bool: True if a preview exists afterwards
+    """
+    target_folder = preview_subfolder(document_type)
+    target = preview_filename(filename)
+    if storage.exists(target_folder, target):
+        return True
+
+    extension = filename.rsplit('.', 1)[-1].lower()
+    try:
+        with storage.open(document_type, filename) as source:
+            if extension in IMAGE_EXTENSIONS:
+                image = _render_image(source)
+            elif extension == 'pdf':
+                image = _render_pdf_first_page(source)
+            else:
+                return False
+        if image is None:
+            return False
+
+        output = io.BytesIO()
+        image.save(output, 'JPEG', quality=PREVIEW_QUALITY, optimize=True)
+        output.seek(0)
+        storage.write(output, target_folder, target)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to generate preview for {document_type}/{filename}: {str(e)}")
+        return False
+
+def schedule_previews(storage, documents):
+    """
+    Queue preview generation without blocking the request.
+
+    Args:
+        storage: StorageBackend holding the originals
+        documents: iterable of (document_type, filename) pairs
+    """
+    for document_type, filename in documents:
+        if filename:
+            _preview_executor.submit(generate_preview, storage, document_type, filename)
@@ -0,0 +1,92 @@
+"""
+Query counting for catching N+1 loads.
+
+count_queries() counts the statements executed by the current thread inside
+a block. When QUERY_BUDGET is set in the app config (e.g. while testing),
+every request is checked against it and QueryBudgetExceeded is raised once
+a page issues more statements than the budget, however many rows it shows.
+`python -m benchmarks.bench_queries` runs the list pages this way.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_local = threading.local()
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised when a block or request runs more queries than allowed"""
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    for counter in getattr(_local, 'counters', ()):
+        counter.count += 1
+        counter.statements.append(statement)
+
+def _push():
+    counter = QueryCounter()
+    if not hasattr(_local, 'counters'):
+        _local.counters = []
+    _local.counters.append(counter)
+    return counter
+
+def _pop(counter):
+    _local.counters.remove(counter)
+
+@contextmanager
+def count_queries(budget=None):
+    """
+    Count the queries executed in this thread inside the block.
+
+    Args:
+        budget: Optional maximum; QueryBudgetExceeded is raised on exit if
+            more queries than this were executed
+
+    Yields:
+        QueryCounter: Running count and the statements seen so far
+    """
+    counter = _push()
+    try:
+        yield counter
+    finally:
+        _pop(counter)
+    if budget is not None and counter.count > budget:
+        raise QueryBudgetExceeded(_budget_message(budget, counter))
+
+def _budget_message(budget, counter, label='block'):
+    statements = '\n'.join(counter.statements)
+    return f"{label} ran {counter.count} queries, budget is {budget}:\n{statements}"
+
+def init_query_budget(app):
+    """Check every request against app.config['QUERY_BUDGET'] when it is set"""
+    @app.before_request
+    def _start_query_count():
+        if app.config.get('QUERY_BUDGET') is not None:
+            g.query_counter = _push()
+
+    @app.after_request
+    def _check_query_budget(response):
+        counter = g.pop('query_counter', None)
+        if counter is None:
+            return response
+        _pop(counter)
+        budget = app.config['QUERY_BUDGET']
+        if counter.count > budget:
+            label = f"{request.method} {request.path}"
+            raise QueryBudgetExceeded(_budget_message(budget, counter, label))
+        return response
+
+    @app.teardown_request
+    def _drop_query_count(exc):
+        # after_request is skipped when the view raised
+        counter = g.pop('query_counter', None)
+        if counter is not None:
+            _pop(counter)
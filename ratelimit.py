@@ -0,0 +1,181 @@
+"""
+Rate limiting for authentication endpoints.
+
+Login, 2FA and password reset attempts are limited per client IP and per
+account. Routes call limiter.hit() before any database lookup or password
+hashing, so throttled traffic costs almost nothing.
+
+Two backends are available:
+    MemoryBackend: token buckets in this process (the default)
+    SharedBackend: sliding-window counters in a store shared by all
+        workers, such as a redis.Redis client; LocalSharedStore is an
+        in-process stand-in with the same interface for development
+"""
+
+import threading
+import time
+
+# scope -> [(key kind, attempts, window seconds)]
+DEFAULT_LIMITS = {
+    'login': [('ip', 20, 60), ('account', 5, 300)],
+    'verify_2fa': [('ip', 20, 60), ('account', 5, 300)],
+    'forgot_password': [('ip', 5, 300), ('account', 3, 3600)],
+}
+
+MAX_MEMORY_BUCKETS = 100000
+
+class MemoryBackend:
+    """Token buckets held in this process"""
+
+    def __init__(self, max_buckets=MAX_MEMORY_BUCKETS):
+        self.max_buckets = max_buckets
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window):
+        """
+        Take one token from a bucket refilled at limit/window per second.
+
+        Returns:
+            float or None: Seconds until a token is available if the bucket
+            is empty, otherwise None
+        """
+        rate = limit / window
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _, _ = self._buckets.get(key, (limit, now, limit, rate))
+            tokens = min(limit, tokens + (now - updated) * rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, limit, rate)
+                return (1 - tokens) / rate
+            if len(self._buckets) >= self.max_buckets and key not in self._buckets:
+                self._prune(now)
+            self._buckets[key] = (tokens - 1, now, limit, rate)
+            return None
+
+    def _prune(self, now):
+        # Drop buckets that have refilled completely since they were last used
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items()
+            if bucket[0] + (now - bucket[1]) * bucket[3] < bucket[2]
+        }
+
+    def reset(self, key, window):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+class LocalSharedStore:
+    """In-process stand-in for a shared counter store such as Redis"""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _expire_old(self, now):
+        for key in [key for key, (_, expires_at) in self._values.items() if expires_at <= now]:
+            del self._values[key]
+
+    def incrby(self, key, amount):
+        now = time.time()
+        with self._lock:
+            self._expire_old(now)
+            value, expires_at = self._values.get(key, (0, float('inf')))
+            self._values[key] = (value + amount, expires_at)
+            return value + amount
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if key in self._values:
+                self._values[key] = (self._values[key][0], time.time() + seconds)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            value, expires_at = self._values.get(key, (None, 0))
+            return value if expires_at > now else None
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+
+class SharedBackend:
+    """Sliding-window counters in a store shared between processes"""
+
+    def __init__(self, store, prefix='ratelimit:'):
+        self.store = store
+        self.prefix = prefix
+
+    def _window_keys(self, key, window, now):
+        index = int(now // window)
+        return f'{self.prefix}{key}:{index}', f'{self.prefix}{key}:{index - 1}', now - index * window
+
+    def hit(self, key, limit, window):
+        """
+        Count an attempt against a sliding window.
+
+        The previous window's count is weighted by how much of it still
+        overlaps the sliding window, which needs only two counters per key.
+
+        Returns:
+            float or None: Seconds to wait if over the limit, otherwise None
+        """
+        now = time.time()
+        current_key, previous_key, elapsed = self._window_keys(key, window, now)
+        count = self.store.incrby(current_key, 1)
+        if count == 1:
+            self.store.expire(current_key, int(window * 2))
+        previous = int(self.store.get(previous_key) or 0)
+        estimated = previous * (1 - elapsed / window) + count
+        if estimated > limit:
+            return window - elapsed
+        return None
+
+    def reset(self, key, window):
+        current_key, previous_key, _ = self._window_keys(key, window, time.time())
+        self.store.delete(current_key, previous_key)
+
+class RateLimiter:
+    def __init__(self, backend=None, limits=None):
+        self.backend = backend or MemoryBackend()
+        self.limits = limits or DEFAULT_LIMITS
+
+    def hit(self, scope, **keys):
+        """
+        Record an attempt in a scope for each given key kind (ip, account).
+
+        Returns:
+            float or None: Longest wait in seconds if any limit is exceeded,
+            otherwise None
+        """
+        retry_after = None
+        for kind, limit, window in self.limits[scope]:
+            value = keys.get(kind)
+            if value is None:
+                continue
+            wait = self.backend.hit(f'{scope}:{kind}:{value}', limit, window)
+            if wait is not None:
+                retry_after = max(retry_after or 0, wait)
+        return retry_after
+
+    def reset(self, scope, **keys):
+        """Clear counters after a successful attempt, e.g. a completed login"""
+        for kind, _, window in self.limits[scope]:
+            value = keys.get(kind)
+            if value is not None:
+                self.backend.reset(f'{scope}:{kind}:{value}', window)
+
+limiter = RateLimiter()
+
+def init_rate_limiting(app):
+    """
+    Configure the limiter from the app config.
+
+    Config:
+        RATE_LIMIT_STORE: Shared counter store (e.g. a redis.Redis client);
+            the per-process MemoryBackend is used when unset
+        RATE_LIMITS: Optional overrides of DEFAULT_LIMITS by scope
+    """
+    store = app.config.get('RATE_LIMIT_STORE')
+    limiter.backend = SharedBackend(store) if store is not None else MemoryBackend()
+    limiter.limits = {**DEFAULT_LIMITS, **app.config.get('RATE_LIMITS', {})}
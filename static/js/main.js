@@ -23,6 +23,9 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Mobile menu handling
     setupMobileMenu();
+    
+    // Dashboard history tables loaded on demand
+    setupHistoryLoaders();
 });
 
 function initializeTooltips() {
@@ -47,83 +50,12 @@ function initializeFormValidation() {
 
 function initializeBloodStockChart() {
     const chartCanvas = document.getElementById('bloodStockChart');
-    if (chartCanvas) {
-        const ctx = chartCanvas.getContext('2d');
-        
-        // Blood type data
-        const bloodTypes = ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-'];
-        const currentStock = [65, 45, 75, 35, 25, 15, 85, 55];
-        const optimalStock = [100, 70, 100, 60, 50, 40, 120, 80];
-        
-        // Create gradient for bars
-        const gradient = ctx.createLinearGradient(0, 0, 0, 400);
-        gradient.addColorStop(0, 'rgba(220, 53, 69, 0.8)');
-        gradient.addColorStop(1, 'rgba(220, 53, 69, 0.4)');
-        
-        new Chart(chartCanvas, {
-            type: 'bar',
-            data: {
-                labels: bloodTypes,
-                datasets: [
-                    {
-                        label: 'Current Stock (units)',
-                        data: currentStock,
-                        backgroundColor: gradient,
-                        borderColor: 'rgba(220, 53, 69, 1)',
-                        borderWidth: 1,
-                        borderRadius: 5,
-                    },
-                    {
-                        label: 'Optimal Stock Level',
-                        data: optimalStock,
-                        type: 'line',
-                        borderColor: 'rgba(0, 123, 255, 0.7)',
-                        borderWidth: 2,
-                        pointBackgroundColor: 'rgba(0, 123, 255, 0.8)',
-                        pointRadius: 4,
-                        fill: false
-                    }
-                ]
-            },
-            options: {
-                responsive: true,
-                maintainAspectRatio: false,
-                plugins: {
-                    legend: {
-                        position: 'bottom'
-                    },
-                    tooltip: {
-                        mode: 'index',
-                        intersect: false,
-                        callbacks: {
-                            label: function(context) {
-                                let label = context.dataset.label || '';
-                                if (label) {
-                                    label += ': ';
-                                }
-                                label += context.parsed.y + ' units';
-                                return label;
-                            }
-                        }
-                    }
-                },
-                scales: {
-                    y: {
-                        beginAtZero: true,
-                        title: {
-                            display: true,
-                            text: 'Units'
-                        }
-                    },
-                    x: {
-                        title: {
-                            display: true,
-                            text: 'Blood Type'
-                        }
-                    }
-                }
-            }
-        });
+    if (chartCanvas && chartCanvas.dataset.stockUrl) {
+        // Stock levels come from the server; the browser revalidates with the ETag
+        fetch(chartCanvas.dataset.stockUrl, { credentials: 'same-origin' })
+            .then(response => response.json())
+            .then(stock => drawBloodStockChart(chartCanvas, stock))
+            .catch(error => console.error('Failed to load blood stock levels:', error));
     }
     
     // For donor/receiver dashboard blood availability visualization
@@ -147,6 +79,122 @@ function initializeBloodStockChart() {
     }
 }
 
+function drawBloodStockChart(chartCanvas, stock) {
+    const ctx = chartCanvas.getContext('2d');
+    
+    // Blood type data
+    const bloodTypes = stock.blood_types;
+    const currentStock = stock.current;
+    const optimalStock = stock.optimal;
+    
+    // Create gradient for bars
+    const gradient = ctx.createLinearGradient(0, 0, 0, 400);
+    gradient.addColorStop(0, 'rgba(220, 53, 69, 0.8)');
+    gradient.addColorStop(1, 'rgba(220, 53, 69, 0.4)');
+    
+    new Chart(chartCanvas, {
+        type: 'bar',
+        data: {
+            labels: bloodTypes,
+            datasets: [
+                {
+                    label: 'Current Stock (units)',
+                    data: currentStock,
+                    backgroundColor: gradient,
+                    borderColor: 'rgba(220, 53, 69, 1)',
+                    borderWidth: 1,
+                    borderRadius: 5,
+                },
+                {
+                    label: 'Optimal Stock Level',
+                    data: optimalStock,
+                    type: 'line',
+                    borderColor: 'rgba(0, 123, 255, 0.7)',
+                    borderWidth: 2,
+                    pointBackgroundColor: 'rgba(0, 123, 255, 0.8)',
+                    pointRadius: 4,
+                    fill: false
+                }
+            ]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: {
+                    position: 'bottom'
+                },
+                tooltip: {
+                    mode: 'index',
+                    intersect: false,
+                    callbacks: {
+                        label: function(context) {
+                            let label = context.dataset.label || '';
+                            if (label) {
+                                label += ': ';
+                            }
+                            label += context.parsed.y + ' units';
+                            return label;
+                        }
+                    }
+                }
+            },
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    title: {
+                        display: true,
+                        text: 'Units'
+                    }
+                },
+                x: {
+                    title: {
+                        display: true,
+                        text: 'Blood Type'
+                    }
+                }
+            }
+        }
+    });
+}
+
+function setupHistoryLoaders() {
+    document.querySelectorAll('[data-history-url]').forEach(button => {
+        let nextUrl = button.dataset.historyUrl;
+        let firstPage = true;
+        
+        button.addEventListener('click', () => {
+            const tbody = document.getElementById(button.dataset.historyTarget);
+            button.disabled = true;
+            
+            fetch(nextUrl, { credentials: 'same-origin' })
+                .then(response => response.json())
+                .then(page => {
+                    // The first page replaces the server-rendered recent rows
+                    if (firstPage) {
+                        tbody.innerHTML = '';
+                        firstPage = false;
+                    }
+                    // Rows come rendered from the same partial as the dashboard's own
+                    tbody.insertAdjacentHTML('beforeend', page.html);
+                    tbody.querySelectorAll('[data-bs-toggle="tooltip"]').forEach(element => bootstrap.Tooltip.getOrCreateInstance(element));
+                    
+                    nextUrl = page.next;
+                    if (nextUrl) {
+                        button.textContent = 'Load More';
+                        button.disabled = false;
+                    } else {
+                        button.remove();
+                    }
+                })
+                .catch(error => {
+                    console.error('Failed to load history:', error);
+                    button.disabled = false;
+                });
+        });
+    });
+}
+
 function setupFlashMessages() {
     const flashMessages = document.querySelectorAll('.alert:not(.alert-permanent)');
     flashMessages.forEach(message => {
@@ -0,0 +1,199 @@
+"""
+Storage backends for uploaded verification documents.
+
+Uploads are streamed in fixed-size chunks while a SHA-256 of the content is
+computed, and stored under the content hash so identical files are kept
+once. LocalStorage writes below a directory on disk; ObjectStoreStorage
+delegates to any client implementing ObjectStoreClient.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import send_file, send_from_directory
+
+DEFAULT_CHUNK_SIZE = 256 * 1024  # 256KB
+
+# Shared by all requests so concurrent uploads are bounded per worker
+_upload_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='upload')
+
+def hashed_filename(digest, original_filename):
+    """Build the stored filename from a content hash, keeping the extension"""
+    extension = original_filename.rsplit('.', 1)[1].lower() if '.' in original_filename else ''
+    return f"{digest}.{extension}" if extension else digest
+
+class StorageBackend:
+    """Interface shared by all document storage backends"""
+
+    def save(self, stream, subfolder, original_filename):
+        """
+        Store the content of a readable binary stream.
+
+        Returns:
+            str: The stored filename, derived from the content hash
+        """
+        raise NotImplementedError
+
+    def write(self, stream, subfolder, filename):
+        """Store a stream under an explicit filename, e.g. a derived preview"""
+        raise NotImplementedError
+
+    def exists(self, subfolder, filename):
+        raise NotImplementedError
+
+    def open(self, subfolder, filename):
+        """Open a stored file for binary reading"""
+        raise NotImplementedError
+
+    def send(self, subfolder, filename):
+        """Build a response serving a stored file"""
+        raise NotImplementedError
+
+    def save_many(self, uploads):
+        """
+        Store several uploads concurrently.
+
+        Args:
+            uploads: dict mapping a key to (stream, subfolder, original_filename)
+
+        Returns:
+            dict: The same keys mapped to stored filenames
+        """
+        futures = {
+            key: _upload_executor.submit(self.save, stream, subfolder, original_filename)
+            for key, (stream, subfolder, original_filename) in uploads.items()
+        }
+        return {key: future.result() for key, future in futures.items()}
+
+class LocalStorage(StorageBackend):
+    """Stores documents in subfolders of a local directory"""
+
+    def __init__(self, root, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.root = root
+        self.chunk_size = chunk_size
+
+    def path(self, subfolder, filename):
+        return os.path.join(self.root, subfolder, filename)
+
+    def save(self, stream, subfolder, original_filename):
+        directory = os.path.join(self.root, subfolder)
+        os.makedirs(directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            filename = hashed_filename(digest.hexdigest(), original_filename)
+            final_path = os.path.join(directory, filename)
+            if os.path.exists(final_path):
+                # Identical content is already stored
+                os.remove(temp_path)
+            else:
+                os.replace(temp_path, final_path)
+            return filename
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def write(self, stream, subfolder, filename):
+        directory = os.path.join(self.root, subfolder)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                shutil.copyfileobj(stream, temp_file, self.chunk_size)
+            os.replace(temp_path, os.path.join(directory, filename))
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def exists(self, subfolder, filename):
+        return os.path.exists(self.path(subfolder, filename))
+
+    def open(self, subfolder, filename):
+        return open(self.path(subfolder, filename), 'rb')
+
+    def send(self, subfolder, filename):
+        return send_from_directory(os.path.join(self.root, subfolder), filename)
+
+class ObjectStoreClient:
+    """Minimal client interface an object store (S3, GCS, ...) adapter implements"""
+
+    def put_object(self, key, fileobj):
+        raise NotImplementedError
+
+    def object_exists(self, key):
+        raise NotImplementedError
+
+    def get_object(self, key):
+        """Return a readable binary file object for key"""
+        raise NotImplementedError
+
+class ObjectStoreStorage(StorageBackend):
+    """
+    Stores documents in an object store.
+
+    Chunks are hashed while being spooled to a local temporary file, which
+    is then uploaded once under its content-hash key unless already present.
+    """
+
+    def __init__(self, client, prefix='', chunk_size=DEFAULT_CHUNK_SIZE):
+        self.client = client
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+
+    def key(self, subfolder, filename):
+        return f"{self.prefix}{subfolder}/{filename}"
+
+    def save(self, stream, subfolder, original_filename):
+        digest = hashlib.sha256()
+        with tempfile.TemporaryFile() as spool:
+            while True:
+                chunk = stream.read(self.chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                spool.write(chunk)
+
+            filename = hashed_filename(digest.hexdigest(), original_filename)
+            key = self.key(subfolder, filename)
+            if not self.client.object_exists(key):
+                spool.seek(0)
+                self.client.put_object(key, spool)
+            return filename
+
+    def write(self, stream, subfolder, filename):
+        self.client.put_object(self.key(subfolder, filename), stream)
+
+    def exists(self, subfolder, filename):
+        return self.client.object_exists(self.key(subfolder, filename))
+
+    def open(self, subfolder, filename):
+        return self.client.get_object(self.key(subfolder, filename))
+
+    def send(self, subfolder, filename):
+        return send_file(self.open(subfolder, filename), download_name=filename)
+
+def get_storage():
+    """The current app's document storage, created on first use"""
+    from flask import current_app
+
+    storage = current_app.extensions.get('document_storage')
+    if storage is None:
+        # Swap for ObjectStoreStorage to use a bucket
+        storage = current_app.extensions['document_storage'] = LocalStorage(
+            current_app.config['UPLOAD_FOLDER'], chunk_size=current_app.config['UPLOAD_CHUNK_SIZE']
+        )
+    return storage
@@ -0,0 +1,49 @@
+"""
+QR codes for 2FA setup.
+
+The image for a TOTP provisioning URI is rendered once and kept in a small
+LRU cache, so refreshing the setup page re-serves the same bytes instead of
+re-encoding the QR code. qrcode (and PIL, for PNG) are imported on first
+use only.
+"""
+
+import hashlib
+import io
+from functools import lru_cache
+
+QR_CACHE_SIZE = 256
+
+MIMETYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def render_qr(uri, fmt='png'):
+    """
+    Render a QR code for a provisioning URI.
+
+    Args:
+        uri: otpauth:// URI, which embeds the user's secret
+        fmt: 'png' or 'svg'
+
+    Returns:
+        bytes: Encoded image
+    """
+    import qrcode
+
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(uri)
+    qr.make(fit=True)
+
+    buffered = io.BytesIO()
+    if fmt == 'svg':
+        import qrcode.image.svg
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffered)
+    else:
+        qr.make_image(fill_color="black", back_color="white").save(buffered)
+    return buffered.getvalue()
+
+def qr_etag(uri, fmt):
+    """Stable validator for a rendered code that does not reveal the secret"""
+    return hashlib.sha256(f'{fmt}:{uri}'.encode()).hexdigest()
@@ -0,0 +1,110 @@
+"""
+Cached user identity for Flask-Login.
+
+load_user() answers from a short-lived per-process cache of the fields that
+decorators and templates read on every page (role, verification and
+eligibility), so most requests skip the user lookup. Each request gets a
+fresh UserSnapshot built from the cached values; anything not in the
+snapshot, and any attribute write, goes through to the User row, loaded on
+first use. Cached entries are dropped whenever a flush changes or deletes a
+user (profile edits, verification reviews, password resets, donations), and
+invalidate_user() covers bulk updates that bypass the ORM.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from cache import TTLCache
+from extensions import db
+from models import User
+
+USER_CACHE_TTL = 30  # seconds
+
+SNAPSHOT_FIELDS = (
+    'id', 'email', 'first_name', 'last_name', 'role', 'blood_type',
+    'is_available', 'totp_enabled', 'is_verified', 'verification_status',
+    'verification_date', 'last_donation_date', 'next_eligible_date',
+)
+
+_user_cache = TTLCache(ttl=USER_CACHE_TTL, maxsize=10000)
+
+class UserSnapshot:
+    """Read-mostly stand-in for the logged-in User"""
+    __slots__ = SNAPSHOT_FIELDS + ('_model',)
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    # Pure functions of snapshot fields, shared with the model
+    can_donate = User.can_donate
+    get_full_name = User.get_full_name
+
+    def __init__(self, values):
+        for name, value in zip(SNAPSHOT_FIELDS, values):
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, '_model', None)
+
+    def get_id(self):
+        return str(self.id)
+
+    @property
+    def model(self):
+        """The User row, loaded into the current session on first use"""
+        if self._model is None:
+            object.__setattr__(self, '_model', db.session.get(User, self.id))
+        return self._model
+
+    def __getattr__(self, name):
+        # Only reached for names outside the snapshot, e.g. totp_secret
+        return getattr(self.model, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.model, name, value)
+        if name in SNAPSHOT_FIELDS:
+            object.__setattr__(self, name, value)
+
+def _snapshot_values(user):
+    return tuple(getattr(user, name) for name in SNAPSHOT_FIELDS)
+
+def load_cached_user(user_id):
+    """
+    Flask-Login user loader backed by the identity cache.
+
+    Returns:
+        UserSnapshot or None if the user does not exist
+    """
+    values = _user_cache.get(user_id)
+    if values is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        values = _snapshot_values(user)
+        _user_cache.set(user_id, values)
+    return UserSnapshot(values)
+
+def invalidate_user(user_id):
+    """Drop a user's cached identity after a change made outside the ORM"""
+    _user_cache.delete(user_id)
+
+def clear_user_cache():
+    _user_cache.clear()
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    changed = {obj.id for obj in (*session.dirty, *session.deleted) if isinstance(obj, User)}
+    if changed:
+        for user_id in changed:
+            invalidate_user(user_id)
+        session.info.setdefault('changed_user_ids', set()).update(changed)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_users(session):
+    # Drop again at commit in case another request cached the old row
+    # between the flush and the commit
+    for user_id in session.info.pop('changed_user_ids', ()):
+        invalidate_user(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_users(session):
+    session.info.pop('changed_user_ids', None)
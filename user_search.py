@@ -0,0 +1,87 @@
+"""
+User search for the admin users page.
+
+On PostgreSQL with pg_trgm the search runs in SQL against two expression
+indexes over name and email: a tsvector index for word prefixes and a
+trigram GIN index for substrings and typos. Elsewhere (SQLite test
+databases, or Postgres without the extension) every word must appear
+somewhere in the same text, checked with LIKE; there is no typo tolerance,
+but nothing is held in memory that other workers could see stale. Both
+paths return a filter to combine with the rest of the listing query, so
+results page through keyset pagination like other lists.
+"""
+
+import re
+
+from sqlalchemy import text
+
+from cache import TTLCache
+from extensions import db
+from models import User
+
+_WORD_RE = re.compile(r'\w+')
+
+def search_words(term):
+    return _WORD_RE.findall(term.lower())
+
+def _search_text():
+    """The indexed expression; must match migrations/versions/0005_user_search_indexes.py exactly"""
+    empty, space = db.literal_column("''"), db.literal_column("' '")
+    return (
+        db.func.coalesce(User.first_name, empty).op('||')(space)
+        .op('||')(db.func.coalesce(User.last_name, empty)).op('||')(space)
+        .op('||')(User.email)
+    )
+
+_trigram_support = TTLCache(ttl=3600, maxsize=1)
+
+def _has_trigram_support():
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    return _trigram_support.get_or_set('pg_trgm', lambda: db.session.execute(
+        text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+    ).first() is not None)
+
+def _sql_search_filter(term, words):
+    search_text = _search_text()
+    lowered = db.func.lower(search_text)
+    conditions = [
+        # Substring match, served by the trigram index
+        lowered.contains(term.lower(), autoescape=True),
+        # Fuzzy match of the whole term against any part of the text
+        lowered.op('%>')(term.lower()),
+    ]
+    if words:
+        tsquery = ' & '.join(f'{word}:*' for word in words)
+        conditions.append(
+            db.func.to_tsvector(db.literal_column("'simple'"), search_text).op('@@')(
+                db.func.to_tsquery('simple', tsquery)
+            )
+        )
+    return db.or_(*conditions)
+
+def _like_search_filter(term, words):
+    lowered = db.func.lower(_search_text())
+    if not words:
+        return lowered.contains(term.lower(), autoescape=True)
+    return db.and_(*(lowered.contains(word, autoescape=True) for word in words))
+
+def user_search_filter(term):
+    """
+    Build a filter clause selecting users that match a search term.
+
+    On PostgreSQL with pg_trgm, each word of the term matches a name or
+    email word by prefix, or approximately when it is misspelled, and the
+    whole term also matches as a substring. Elsewhere each word must be a
+    substring of the name or email.
+
+    Returns:
+        ColumnElement or None: Filter for User queries, None for a blank term
+    """
+    term = term.strip()
+    words = search_words(term)
+    if not term:
+        return None
+    if _has_trigram_support():
+        return _sql_search_filter(term, words)
+    return _like_search_filter(term, words)
@@ -10,6 +10,10 @@ def validate_email(email):
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email) is not None
 
+def normalize_email(email):
+    """Canonical form emails are stored and looked up in; addresses are case-insensitive."""
+    return email.strip().lower()
+
 def validate_password(password):
     """
     Validate password strength.
@@ -66,7 +70,7 @@ def admin_required(f):
     def decorated_function(*args, **kwargs):
         if not current_user.is_authenticated or current_user.role != 'admin':
             flash('You need to be an admin to access this page.', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('public.index'))
         return f(*args, **kwargs)
     return decorated_function
 
@@ -76,7 +80,7 @@ def donor_required(f):
     def decorated_function(*args, **kwargs):
         if not current_user.is_authenticated or current_user.role != 'donor':
             flash('You need to be a donor to access this page.', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('public.index'))
         return f(*args, **kwargs)
     return decorated_function
 
@@ -86,7 +90,7 @@ def receiver_required(f):
     def decorated_function(*args, **kwargs):
         if not current_user.is_authenticated or current_user.role != 'receiver':
             flash('You need to be a receiver to access this page.', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('public.index'))
         return f(*args, **kwargs)
     return decorated_function
 
@@ -98,21 +102,52 @@ def calculate_next_donation_date(last_donation_date):
     """Calculate when user can donate again (56 days after last donation)."""
     return last_donation_date + timedelta(days=56)
 
+# ABO/Rh types in a fixed order; each type owns one bit in the masks below.
+BLOOD_TYPES = ('A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-')
+BLOOD_TYPE_BITS = {blood_type: 1 << i for i, blood_type in enumerate(BLOOD_TYPES)}
+
+# Bitmask of recipient types each donor type can give to
+DONOR_COMPATIBILITY_MASKS = {
+    'A+': BLOOD_TYPE_BITS['A+'] | BLOOD_TYPE_BITS['AB+'],
+    'A-': BLOOD_TYPE_BITS['A+'] | BLOOD_TYPE_BITS['A-'] | BLOOD_TYPE_BITS['AB+'] | BLOOD_TYPE_BITS['AB-'],
+    'B+': BLOOD_TYPE_BITS['B+'] | BLOOD_TYPE_BITS['AB+'],
+    'B-': BLOOD_TYPE_BITS['B+'] | BLOOD_TYPE_BITS['B-'] | BLOOD_TYPE_BITS['AB+'] | BLOOD_TYPE_BITS['AB-'],
+    'AB+': BLOOD_TYPE_BITS['AB+'],
+    'AB-': BLOOD_TYPE_BITS['AB+'] | BLOOD_TYPE_BITS['AB-'],
+    'O+': BLOOD_TYPE_BITS['A+'] | BLOOD_TYPE_BITS['B+'] | BLOOD_TYPE_BITS['AB+'] | BLOOD_TYPE_BITS['O+'],
+    'O-': (1 << len(BLOOD_TYPES)) - 1,
+}
+
+def _types_in_mask(mask):
+    return tuple(blood_type for blood_type in BLOOD_TYPES if mask & BLOOD_TYPE_BITS[blood_type])
+
+# Lookup tables built once at import time
+COMPATIBLE_RECIPIENT_TYPES = {
+    donor_type: _types_in_mask(mask) for donor_type, mask in DONOR_COMPATIBILITY_MASKS.items()
+}
+COMPATIBLE_DONOR_TYPES = {
+    recipient_type: tuple(
+        donor_type for donor_type in BLOOD_TYPES
+        if DONOR_COMPATIBILITY_MASKS[donor_type] & BLOOD_TYPE_BITS[recipient_type]
+    )
+    for recipient_type in BLOOD_TYPES
+}
+
 def calculate_blood_compatibility(blood_type):
     """
     Returns a list of compatible blood types for a given blood type.
     """
-    compatibility = {
-        'A+': ['A+', 'AB+'],
-        'A-': ['A+', 'A-', 'AB+', 'AB-'],
-        'B+': ['B+', 'AB+'],
-        'B-': ['B+', 'B-', 'AB+', 'AB-'],
-        'AB+': ['AB+'],
-        'AB-': ['AB+', 'AB-'],
-        'O+': ['A+', 'B+', 'AB+', 'O+'],
-        'O-': ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']
-    }
-    return compatibility.get(blood_type, [])
+    return list(COMPATIBLE_RECIPIENT_TYPES.get(blood_type, ()))
+
+def calculate_donor_compatibility(blood_type):
+    """
+    Returns a list of donor blood types that can give to a given blood type.
+    """
+    return list(COMPATIBLE_DONOR_TYPES.get(blood_type, ()))
+
+def is_blood_compatible(donor_type, recipient_type):
+    """Check whether a donor blood type can give to a recipient blood type."""
+    return bool(DONOR_COMPATIBILITY_MASKS.get(donor_type, 0) & BLOOD_TYPE_BITS.get(recipient_type, 0))
 
 def sanitize_input(text):
     """Sanitize user input to prevent XSS."""